@@ -0,0 +1,341 @@
+"""
+async_backend.py
+2026.10.17
+asyncio 기반 생성 API (비동기 웹 서버용)
+
+요청 구성, 출력 검증, 결과/번역 캐시, 토큰 예산은 backend 의 것을 그대로 쓰고 Bedrock 호출만 asyncio 로 실행한다.
+backend 의 동기 함수는 지금처럼 같은 요청 구성/검증 함수를 감싸는 얇은 래퍼로 남는다.
+aiobotocore 가 설치되어 있으면 이벤트 루프마다 클라이언트(aiohttp 세션) 하나를 공유해 요청당 스레드 없이 수백 개의 호출을 동시에 보내고,
+설치되어 있지 않거나 aws_clients.set_client 로 대역을 넣은 경우, BEDROCK_REGIONS 로 리전을 여러 개 지정한 경우에는
+region_pool 의 리전 풀(boto3 클라이언트)을 asyncio.to_thread 로 호출한다 (aiobotocore 경로는 기본 리전 하나만 쓴다).
+호출 종류(text / image)별 동시 요청 수는 세마포어로 제한한다 (ASYNC_TEXT_CONCURRENCY, ASYNC_IMAGE_CONCURRENCY).
+
+사용 예:
+    import async_backend
+    data, meta = await async_backend.generate_stat_with_meta("weapon", "맹독 단검", "독이 묻은 단검")
+    image = await async_backend.generate_image_from_prompt("weapon", "맹독 단검", "독이 묻은 단검")
+    await async_backend.close()  # 서버 종료 시
+"""
+import asyncio
+import contextlib
+import json
+import os
+import weakref
+
+import aws_clients
+import backend
+import tracing
+from backend import (
+    IMAGE_MODEL_ID,
+    MODEL_ID,
+    build_image_request_from_prompt,
+    build_stat_request,
+    build_translation_request,
+    finish_stat,
+    get_image_tier,
+    get_item_kind,
+    get_pool,
+    lookup_stat,
+    lookup_translation,
+    translation_budget,
+)
+from singleflight import AsyncSingleFlight
+
+# 이벤트 루프 하나에서 동시에 진행할 수 있는 Bedrock 호출 수
+ASYNC_TEXT_CONCURRENCY = int(os.environ.get("ASYNC_TEXT_CONCURRENCY", "64"))
+ASYNC_IMAGE_CONCURRENCY = int(os.environ.get("ASYNC_IMAGE_CONCURRENCY", "8"))
+# auto: aiobotocore 가 있으면 사용, thread: 항상 boto3 클라이언트를 스레드에서 호출
+ASYNC_CLIENT_MODE = os.environ.get("ASYNC_CLIENT_MODE", "auto")
+
+
+def _load_aiobotocore():
+    """aiobotocore 의 (get_session, AioConfig) 반환 (사용하지 않거나 설치되어 있지 않으면 None)"""
+    if ASYNC_CLIENT_MODE == "thread":
+        return None
+    try:
+        from aiobotocore.config import AioConfig
+        from aiobotocore.session import get_session
+    except ImportError:
+        return None
+    return get_session, AioConfig
+
+
+class _ThreadedClient:
+    """region_pool 의 리전 풀(boto3 클라이언트)을 asyncio.to_thread 로 호출하는 어댑터"""
+
+    def __init__(self, profile_name):
+        self.profile_name = profile_name
+
+    def _invoke(self, operation, kwargs):
+        response = get_pool(self.profile_name).invoke_model(operation, **kwargs)
+        # 본문 읽기도 소켓을 기다리므로 같은 스레드에서 끝낸다
+        return response, response["body"].read()
+
+    async def invoke_model(self, operation=None, **kwargs):
+        return await asyncio.to_thread(self._invoke, operation, kwargs)
+
+
+class _AioClient:
+    """aiobotocore 클라이언트 어댑터 (리전 풀을 거치지 않고 기본 리전 하나로 호출)"""
+
+    def __init__(self, client):
+        self._client = client
+
+    async def invoke_model(self, operation=None, **kwargs):
+        response = await self._client.invoke_model(**kwargs)
+        async with response["body"] as stream:
+            data = await stream.read()
+        return response, data
+
+
+class AsyncRuntime:
+    """이벤트 루프 하나에 묶인 클라이언트, 동시 요청 제한 세마포어, 요청 병합기"""
+
+    def __init__(self):
+        self.limits = {
+            "text": asyncio.Semaphore(ASYNC_TEXT_CONCURRENCY),
+            "image": asyncio.Semaphore(ASYNC_IMAGE_CONCURRENCY),
+        }
+        self.stat_flight = AsyncSingleFlight.from_env()
+        self._clients = {}
+        self._client_lock = asyncio.Lock()
+        self._session = None
+        self._exit_stack = None
+
+    async def client(self, profile_name):
+        """호출 종류별 공유 클라이언트 반환 (처음 호출 시 생성)"""
+        client = self._clients.get(profile_name)
+        if client is None:
+            async with self._client_lock:
+                client = self._clients.get(profile_name)
+                if client is None:
+                    client = await self._create_client(profile_name)
+                    self._clients[profile_name] = client
+        return client
+
+    async def _create_client(self, profile_name):
+        # 리전이 여러 개면 장애 전환/헤지를 위해 리전 풀(스레드)로 호출
+        use_pool = aws_clients.is_overridden(profile_name) or len(get_pool(profile_name).regions) > 1
+        aio = None if use_pool else _load_aiobotocore()
+        if aio is None:
+            return _ThreadedClient(profile_name)
+        get_session, AioConfig = aio
+        if self._exit_stack is None:
+            self._session = get_session()
+            self._exit_stack = contextlib.AsyncExitStack()
+        profile = aws_clients.CLIENT_PROFILES[profile_name]
+        config = AioConfig(
+            region_name=profile["region"],
+            max_pool_connections=profile["max_pool_connections"],
+            connect_timeout=profile["connect_timeout"],
+            read_timeout=profile["read_timeout"],
+            retries={"mode": "adaptive", "max_attempts": profile["max_attempts"]},
+        )
+        client = await self._exit_stack.enter_async_context(
+            self._session.create_client(profile["service"], config=config)
+        )
+        return _AioClient(client)
+
+    async def invoke_model(self, profile_name, operation=None, **kwargs):
+        """동시 요청 수를 제한해 invoke_model 호출. (응답, 본문 바이트) 반환 (operation: 리전 풀의 지연 시간 기록 단위)"""
+        client = await self.client(profile_name)
+        async with self.limits[profile_name]:
+            return await client.invoke_model(operation, **kwargs)
+
+    async def close(self):
+        """aiobotocore 클라이언트와 세션 종료"""
+        self._clients.clear()
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+
+
+# 이벤트 루프 → AsyncRuntime (세마포어와 aiohttp 세션은 루프를 넘나들 수 없다)
+_runtimes = weakref.WeakKeyDictionary()
+
+
+def get_runtime():
+    """현재 이벤트 루프의 AsyncRuntime 반환 (처음 호출 시 생성)"""
+    loop = asyncio.get_running_loop()
+    runtime = _runtimes.get(loop)
+    if runtime is None:
+        runtime = _runtimes[loop] = AsyncRuntime()
+    return runtime
+
+
+async def close():
+    """현재 이벤트 루프의 클라이언트 정리 (서버 종료 시 호출)"""
+    runtime = _runtimes.pop(asyncio.get_running_loop(), None)
+    if runtime is not None:
+        await runtime.close()
+
+
+async def invoke_claude_message(body):
+    """backend.invoke_claude_message 의 비동기 버전"""
+    with tracing.span("bedrock.stat") as span:
+        response, data = await get_runtime().invoke_model("text", "stat", modelId=MODEL_ID, body=body)
+        span.record_response(response)
+        message = backend.parse_claude_response(json.loads(data), span)
+    backend.add_usage_totals(message[1])
+    return message
+
+
+async def invoke_with_budget(budget, invoke, build_body):
+    """backend.invoke_with_budget 의 비동기 버전 (invoke 는 코루틴 함수)"""
+    max_tokens = budget.current()
+    text, usage, stop_reason = await invoke(build_body(max_tokens))
+    if backend.record_budget_outcome(budget, max_tokens, usage, stop_reason):
+        text, retry_usage, stop_reason = await invoke(build_body(budget.ceiling))
+        backend.record_budget_outcome(budget, budget.ceiling, retry_usage, stop_reason)
+        usage = backend.merge_usage(usage, retry_usage)
+    return text, usage
+
+
+async def _generate_stat_uncached(kind, name, desc, cache_key):
+    """backend._generate_stat_uncached 의 비동기 버전 (과부하 판단과 절차 생성 대체는 backend 와 공유)"""
+    if not backend.acquire_generation_slot():
+        return backend.generate_fallback(kind, name, desc, "shed"), None, "shed"
+    try:
+        output_text, usage = await invoke_with_budget(
+            get_item_kind(kind)["budget"], invoke_claude_message,
+            lambda max_tokens: build_stat_request(kind, name, desc, max_tokens),
+        )
+    except Exception as e:
+        if not backend.FALLBACK_ENABLED:
+            raise
+        print(f"스탯 생성 호출 실패, 절차 생성 결과로 대체합니다: {e}")
+        return backend.generate_fallback(kind, name, desc, "degraded"), None, "degraded"
+    finally:
+        backend.release_generation_slot()
+    result, fallback = finish_stat(kind, name, desc, output_text, cache_key)
+    return result, usage, fallback
+
+
+async def generate_stat_with_meta(kind, name, desc, use_cache=True):
+    """backend.generate_stat_with_meta 의 비동기 버전 (결과 캐시는 공유, 요청 병합은 이벤트 루프 안에서만)"""
+    key, cached, similar = lookup_stat(kind, name, desc, use_cache)
+    if cached is not None:
+        return json.loads(cached), {"cached": similar is None, "coalesced": False, "usage": None, "fallback": None, "similar": similar}
+
+    flight = get_runtime().stat_flight
+    if key is not None and flight is not None:
+        (result, usage, fallback), shared = await flight.do(key, _generate_stat_uncached, kind, name, desc, key)
+        if shared:
+            usage = None
+    else:
+        (result, usage, fallback), shared = await _generate_stat_uncached(kind, name, desc, key), False
+    return json.loads(result), {"cached": False, "coalesced": shared, "usage": usage, "fallback": fallback, "similar": None}
+
+
+async def generate_stat_data(kind, name, desc, use_cache=True):
+    return (await generate_stat_with_meta(kind, name, desc, use_cache))[0]
+
+
+async def generate_stat(kind, name, desc, use_cache=True):
+    return json.dumps(await generate_stat_data(kind, name, desc, use_cache), ensure_ascii=False, indent=2)
+
+
+async def generate_character_stat(name, char_desc, use_cache=True):
+    return await generate_stat("character", name, char_desc, use_cache)
+
+
+async def generate_weapon_stat(weapon_name, weapon_desc, use_cache=True):
+    return await generate_stat("weapon", weapon_name, weapon_desc, use_cache)
+
+
+async def generate_top_stat(top_name, top_desc, use_cache=True):
+    return await generate_stat("top", top_name, top_desc, use_cache)
+
+
+async def generate_hat_stat(hat_name, hat_desc, use_cache=True):
+    return await generate_stat("hat", hat_name, hat_desc, use_cache)
+
+
+async def generate_shoes_stat(shoes_name, shoes_desc, use_cache=True):
+    return await generate_stat("shoes", shoes_name, shoes_desc, use_cache)
+
+
+async def _invoke_translation(body):
+    with tracing.span("bedrock.translate") as span:
+        response, data = await get_runtime().invoke_model("text", "translation", modelId=MODEL_ID, body=body)
+        span.record_response(response)
+        return backend.parse_claude_response(json.loads(data), span)
+
+
+async def translate_to_english_claude(prompt_ko):
+    text, _ = await invoke_with_budget(
+        translation_budget, _invoke_translation, lambda max_tokens: build_translation_request(prompt_ko, max_tokens)
+    )
+    return text.strip()
+
+
+async def _translate_and_store(text):
+    backend.translation_stats["bedrockCalls"] += 1
+    translated = await translate_to_english_claude(text)
+    backend.translation_cache.set(text, translated)
+    return translated
+
+
+async def translate_to_english(text):
+    """backend.translate_to_english 의 비동기 버전 (번역 캐시 공유)"""
+    translated = lookup_translation(text)
+    if translated is None:
+        translated = await _translate_and_store(text)
+    return translated
+
+
+async def build_image_prompt(equip_type, equip_name, equip_desc):
+    """backend.build_image_prompt 의 비동기 버전 (이름과 설명 번역을 동시에 요청)"""
+    name_en, desc_en = await asyncio.gather(translate_to_english(equip_name), translate_to_english(equip_desc))
+    return f"A {equip_type.lower()} called '{name_en}', {desc_en}"
+
+
+async def invoke_image_model(body, model_id=IMAGE_MODEL_ID):
+    """backend.invoke_image_model 의 비동기 버전 (실패 시 None)"""
+    try:
+        with tracing.span("bedrock.image", model=model_id) as span:
+            response, data = await get_runtime().invoke_model(
+                "image",
+                "image",
+                modelId=model_id,
+                body=body,
+                accept="application/json",
+                contentType="application/json"
+            )
+            span.record_response(response)
+            result = json.loads(data)
+    except Exception as e:
+        print(f"AWS 이미지 생성 중 오류 발생: {str(e)}")
+        return None
+    return backend.decode_image_response(result)
+
+
+async def generate_image_from_prompt(equip_type, equip_name, equip_desc, model_id=IMAGE_MODEL_ID, seed=None, tier=None):
+    get_image_tier(tier)
+    prompt_en = await build_image_prompt(equip_type, equip_name, equip_desc)
+    return await invoke_image_model(build_image_request_from_prompt(equip_type, prompt_en, seed, tier), model_id)
+
+
+async def generate_item(item):
+    """backend.generate_item 의 비동기 버전"""
+    kind = backend.validate_item(item)
+    return await generate_stat_data(kind, item.get("name"), item.get("description"))
+
+
+async def generate_batch(items, handler=None, item_timeout=None):
+    """backend.generate_batch 의 비동기 버전. 모든 항목을 한꺼번에 시작하고 동시 호출 수는 세마포어로 제한한다.
+    item_timeout 은 세마포어 대기 시간을 포함한다. 입력 순서대로 {"index", "isSuccess", "result" | "message"} 목록을 반환"""
+    handler = handler or generate_item
+    item_timeout = item_timeout if item_timeout is not None else backend.BATCH_ITEM_TIMEOUT
+
+    async def run(index, item):
+        try:
+            result = await asyncio.wait_for(handler(item), item_timeout or None)
+        except asyncio.TimeoutError:
+            return {"index": index, "isSuccess": False, "message": "생성 시간이 초과되었습니다."}
+        except Exception as e:
+            print(f"배치 항목 {index} 생성 중 오류 발생: {e}")
+            return {"index": index, "isSuccess": False, "message": str(e)}
+        return {"index": index, "isSuccess": True, "result": result}
+
+    return list(await asyncio.gather(*(run(i, item) for i, item in enumerate(items))))
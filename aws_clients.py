@@ -0,0 +1,133 @@
+"""
+aws_clients.py
+2026.10.17
+boto3 클라이언트 팩토리
+
+호출 종류(text / image / s3)별로 커넥션 풀 크기, 연결/읽기 타임아웃, adaptive 재시도, TCP keepalive 를 설정한다.
+클라이언트는 처음 사용할 때 만들어지고, warm Lambda 컨테이너에서는 다음 호출에도 재사용된다.
+"""
+import os
+import threading
+
+BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "us-east-1")
+
+
+def _env_number(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return type(default)(value)
+
+
+def _profile(name, service, region, max_pool_connections, connect_timeout, read_timeout, max_attempts):
+    """환경 변수(AWS_<NAME>_MAX_POOL 등)로 덮어쓸 수 있는 클라이언트 설정"""
+    prefix = f"AWS_{name.upper()}_"
+    return {
+        "service": service,
+        "region": region,
+        "max_pool_connections": _env_number(prefix + "MAX_POOL", max_pool_connections),
+        "connect_timeout": _env_number(prefix + "CONNECT_TIMEOUT", connect_timeout),
+        "read_timeout": _env_number(prefix + "READ_TIMEOUT", read_timeout),
+        "max_attempts": _env_number(prefix + "MAX_ATTEMPTS", max_attempts),
+    }
+
+
+# 호출 종류별 설정
+# - text: Claude 텍스트 생성. 출력이 짧아 읽기 타임아웃을 짧게 잡고 재시도로 꼬리 지연을 줄인다
+# - image: Titan 이미지 생성. 생성 시간이 길어 읽기 타임아웃을 넉넉히 둔다
+# - s3: 이미지 업로드
+# - batch: Bedrock 배치 추론 작업 생성/조회 (bulk_pipeline 전용이라 warm-up 에서는 만들지 않음)
+CLIENT_PROFILES = {
+    "text": _profile("text", "bedrock-runtime", BEDROCK_REGION, 50, 2.0, 20.0, 4),
+    "image": _profile("image", "bedrock-runtime", BEDROCK_REGION, 20, 2.0, 60.0, 3),
+    "s3": _profile("s3", "s3", None, 50, 2.0, 10.0, 5),
+    "batch": _profile("batch", "bedrock", BEDROCK_REGION, 2, 2.0, 30.0, 5),
+}
+# 요청 처리에 쓰는 클라이언트 (warm-up 대상)
+REQUEST_PROFILES = ("text", "image", "s3")
+
+_clients = {}
+# set_client 로 교체된 클라이언트 이름 (async_backend 는 이 클라이언트를 스레드에서 호출한다)
+_overrides = set()
+_lock = threading.Lock()
+
+
+def create_client(profile_name, region=None):
+    """설정에 맞는 새 boto3 클라이언트 생성 (region 을 주면 설정의 리전 대신 사용)"""
+    import boto3
+    from botocore.config import Config
+
+    profile = CLIENT_PROFILES[profile_name]
+    config = Config(
+        region_name=region or profile["region"],
+        max_pool_connections=profile["max_pool_connections"],
+        connect_timeout=profile["connect_timeout"],
+        read_timeout=profile["read_timeout"],
+        retries={"mode": "adaptive", "max_attempts": profile["max_attempts"]},
+        tcp_keepalive=True,
+    )
+    return boto3.client(profile["service"], config=config)
+
+
+def _client_key(profile_name, region):
+    if region is None or region == CLIENT_PROFILES[profile_name]["region"]:
+        return profile_name
+    return f"{profile_name}@{region}"
+
+
+def get_client(profile_name, region=None):
+    """호출 종류(와 리전)별 공유 클라이언트 반환 (처음 호출 시 생성).
+    set_client 로 기본 클라이언트만 교체했다면 다른 리전에도 그 클라이언트를 반환한다"""
+    key = _client_key(profile_name, region)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                if key != profile_name and profile_name in _overrides:
+                    return _clients[profile_name]
+                client = create_client(profile_name, region)
+                _clients[key] = client
+    return client
+
+
+def set_client(profile_name, client, region=None):
+    """클라이언트 교체 (로컬 대역/벤치마크용). region 을 주면 그 리전의 클라이언트만 교체"""
+    key = _client_key(profile_name, region)
+    with _lock:
+        _clients[key] = client
+        _overrides.add(key)
+
+
+def is_overridden(profile_name):
+    """set_client 로 교체된 클라이언트인지 여부"""
+    return profile_name in _overrides
+
+
+def reset_clients():
+    """생성된 클라이언트 모두 제거"""
+    with _lock:
+        _clients.clear()
+        _overrides.clear()
+
+
+def warm_up(bucket=None, model_id=None):
+    """요청 처리용 클라이언트를 미리 만들고(boto3 로드, 자격 증명/엔드포인트 확인) 연결을 열어 둠.
+    bucket 이 있으면 S3 HEAD 로, model_id 가 있으면 빈 본문 invoke_model(ValidationException 으로 끝나며 과금되지 않음)로
+    커넥션 풀에 연결을 만든다. 만든 클라이언트 이름 목록 반환"""
+    for name in REQUEST_PROFILES:
+        get_client(name)
+    if bucket:
+        try:
+            get_client("s3").head_bucket(Bucket=bucket)
+        except Exception as e:
+            print(f"S3 연결 준비 중 오류 발생: {e}")
+    if model_id:
+        for name in ("text", "image"):
+            try:
+                get_client(name).invoke_model(modelId=model_id, body="{}")
+            except Exception as e:
+                code = getattr(e, "response", {}).get("Error", {}).get("Code")
+                if code != "ValidationException":
+                    print(f"Bedrock 연결 준비 중 오류 발생: {e}")
+    return list(REQUEST_PROFILES)
@@ -0,0 +1,463 @@
+"""
+bulk_pipeline.py
+2026.10.17
+JSONL 대량 생성 파이프라인 (시즌 콘텐츠처럼 수만 건을 lambda_handler 를 거치지 않고 한 번에 생성)
+
+입력: 한 줄에 {"kind", "name", "description"} 하나인 JSONL.
+출력: 입력 항목마다 {"line", "kind", "name", "description", "isSuccess", "result" | "message", "fallback"} 한 줄 (JSONL).
+- ondemand: 제한된 동시 실행으로 backend.generate_stat_with_meta 를 호출한다 (결과 캐시, 요청 병합, 절차 생성 대체,
+  카탈로그 기록이 요청 경로와 같다). 출력은 입력 순서대로 쓴다.
+- batch: backend.build_stat_request 로 같은 요청 본문을 만들어 S3 에 올리고 Bedrock 배치 추론 작업으로 처리한 뒤,
+  출력 파일을 읽어 backend.finish_stat 으로 검증한다. 출력은 배치 추론 출력 파일 순서대로 쓴다 (line 으로 입력 줄을 찾는다).
+입력/출력은 한 줄씩 스트리밍하고, 진행 상황(입력/출력 바이트 위치, 배치 작업 단계)은 <출력>.checkpoint 에 남긴다.
+같은 명령을 다시 실행하면 마지막 체크포인트부터 이어서 처리한다 (체크포인트 뒤에 쓰인 출력은 잘라 내고 다시 만든다).
+장비 이미지는 만들지 않는다.
+
+사용 예:
+    python bulk_pipeline.py items.jsonl results.jsonl -c 16
+    python bulk_pipeline.py items.jsonl results.jsonl --mode batch --s3-uri s3://bucket/bulk --role-arn arn:aws:iam::...:role/...
+    python bulk_pipeline.py items.jsonl results.jsonl --mode batch --fake     # 로컬 Bedrock/S3 대역으로 실행
+"""
+import json
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import aws_clients
+import backend
+import catalog
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+# 배치 모드에서 입력 줄 번호 -> 바이트 위치 색인 (줄마다 8바이트, 결과를 입력 항목과 다시 맞출 때 사용)
+OFFSETS_SUFFIX = ".offsets"
+_OFFSET = struct.Struct("<Q")
+
+# 온디맨드 모드 기본 동시 실행 수
+BULK_CONCURRENCY = int(os.environ.get("BULK_CONCURRENCY", str(backend.BATCH_MAX_WORKERS)))
+# 체크포인트를 남기는 간격 (처리한 항목 수)
+BULK_CHECKPOINT_EVERY = int(os.environ.get("BULK_CHECKPOINT_EVERY", "100"))
+# 배치 추론 입력 파일 하나의 최대 레코드 수
+BATCH_CHUNK_RECORDS = int(os.environ.get("BULK_BATCH_CHUNK_RECORDS", "10000"))
+# 배치 추론 작업 하나에 필요한 최소 레코드 수 (Bedrock 할당량)
+BATCH_MIN_RECORDS = int(os.environ.get("BULK_BATCH_MIN_RECORDS", "100"))
+# 배치 추론 작업 상태 확인 간격 (초)
+BATCH_POLL_SECONDS = float(os.environ.get("BULK_BATCH_POLL_SECONDS", "60"))
+BATCH_DONE_STATUSES = ("Completed", "PartiallyCompleted")
+BATCH_FAILED_STATUSES = ("Failed", "Stopped", "Expired")
+
+
+def parse_s3_uri(uri):
+    """"s3://bucket/prefix" 를 (bucket, prefix) 로 분리"""
+    if not uri or not uri.startswith("s3://"):
+        raise ValueError(f"'{uri}'는 올바른 S3 URI 가 아닙니다. (예: s3://bucket/prefix)")
+    bucket, _, prefix = uri[len("s3://"):].partition("/")
+    return bucket, prefix.strip("/")
+
+
+def load_checkpoint(output_path, input_path, mode):
+    """체크포인트 읽기 (없으면 새 상태). 다른 입력/모드의 체크포인트면 ValueError"""
+    path = output_path + CHECKPOINT_SUFFIX
+    if not os.path.exists(path):
+        return {
+            "mode": mode,
+            "input": os.path.abspath(input_path),
+            "line": 1,
+            "inputOffset": 0,
+            "outputOffset": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "fallbacks": 0,
+            "done": False,
+        }
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state["mode"] != mode or state["input"] != os.path.abspath(input_path):
+        raise ValueError(f"{path} 는 다른 입력/모드({state['mode']})의 체크포인트입니다. 지우거나 다른 출력 파일을 지정하세요.")
+    return state
+
+
+def save_checkpoint(output_path, state):
+    """체크포인트 저장 (임시 파일에 쓴 뒤 교체하므로 중간에 멈춰도 깨지지 않음)"""
+    path = output_path + CHECKPOINT_SUFFIX
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def open_output(path, offset):
+    """출력 파일을 offset 까지만 남기고 이어 쓰도록 연다 (바이너리)"""
+    if offset == 0 or not os.path.exists(path):
+        return open(path, "wb")
+    f = open(path, "r+b")
+    f.truncate(offset)
+    f.seek(offset)
+    return f
+
+
+def read_records(source, line):
+    """source(읽을 위치로 이동한 바이너리 파일)에서 (줄 번호, 줄 시작 위치, 다음 줄 위치, 항목 또는 None, 오류 메시지 또는 None) 을
+    한 줄씩 반환 (빈 줄은 건너뜀)"""
+    while True:
+        start = source.tell()
+        raw = source.readline()
+        if not raw:
+            return
+        end = source.tell()
+        if raw.strip():
+            try:
+                record = json.loads(raw)
+                if not isinstance(record, dict):
+                    raise ValueError("각 줄은 JSON 객체여야 합니다.")
+            except ValueError as e:
+                yield line, start, end, None, f"입력 형식 오류: {e}"
+            else:
+                yield line, start, end, record, None
+        line += 1
+
+
+def result_row(line, record, result=None, fallback=None, message=None):
+    """출력 한 줄 (message 가 있으면 실패)"""
+    row = {"line": line}
+    if record is not None:
+        row.update(kind=record.get("kind"), name=record.get("name"), description=record.get("description"))
+    if message is not None:
+        row.update(isSuccess=False, message=message)
+    else:
+        row.update(isSuccess=True, result=result, fallback=fallback)
+    return row
+
+
+def write_row(out, state, row):
+    out.write((json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8"))
+    if not row["isSuccess"]:
+        state["failed"] += 1
+    else:
+        state["succeeded"] += 1
+        if row["fallback"]:
+            state["fallbacks"] += 1
+
+
+def generate_record(line, record, error):
+    """온디맨드 모드에서 항목 하나 생성 (오류는 실패 줄로 반환)"""
+    if error is not None:
+        return result_row(line, record, message=error)
+    try:
+        kind = backend.validate_item(record)
+        data, meta = backend.generate_stat_with_meta(kind, record.get("name"), record["description"])
+    except Exception as e:
+        print(f"{line}번째 줄 생성 중 오류 발생: {e}", file=sys.stderr)
+        return result_row(line, record, message=str(e))
+    return result_row(line, record, result=data, fallback=meta["fallback"])
+
+
+def run_ondemand(input_path, output_path, concurrency=None, checkpoint_every=None):
+    """온디맨드 모드 실행. 동시에 진행 중인 항목은 concurrency * 2 개까지만 메모리에 둔다"""
+    concurrency = concurrency or BULK_CONCURRENCY
+    checkpoint_every = checkpoint_every or BULK_CHECKPOINT_EVERY
+    state = load_checkpoint(output_path, input_path, "ondemand")
+    if state["done"]:
+        return state
+
+    with open(input_path, "rb") as source, open_output(output_path, state["outputOffset"]) as out, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk") as executor:
+        source.seek(state["inputOffset"])
+        window = deque()
+
+        def write_oldest():
+            line, end, future = window.popleft()
+            write_row(out, state, future.result())
+            state.update(line=line + 1, inputOffset=end, outputOffset=out.tell())
+            if (state["succeeded"] + state["failed"]) % checkpoint_every == 0:
+                out.flush()
+                save_checkpoint(output_path, state)
+
+        for line, _, end, record, error in read_records(source, state["line"]):
+            window.append((line, end, executor.submit(generate_record, line, record, error)))
+            # 가장 오래된 항목이 끝나야 다음 항목을 넣으므로 출력은 입력 순서를 유지한다
+            if len(window) >= concurrency * 2:
+                write_oldest()
+        while window:
+            write_oldest()
+        out.flush()
+    state["done"] = True
+    save_checkpoint(output_path, state)
+    return state
+
+
+def batch_model_input(kind, name, desc):
+    """배치 추론 레코드의 modelInput (요청 경로와 같은 요청 본문).
+    출력이 잘려도 다시 호출할 수 없으므로 max_tokens 는 종류별 상한을 쓰고, 배치 추론은 프롬프트 캐시를 쓰지 않으므로 cache_control 은 뺀다"""
+    body = json.loads(backend.build_stat_request(kind, name, desc, backend.get_item_kind(kind)["max_tokens"]))
+    for block in body["system"]:
+        block.pop("cache_control", None)
+    return json.dumps(body, ensure_ascii=False)
+
+
+def record_id(line):
+    """배치 추론 recordId (11자리 영숫자: 입력 줄 번호)"""
+    return f"{line:011d}"
+
+
+class BatchPipeline:
+    """배치 추론 모드. 단계: prepare(입력 파일 업로드) -> submit(작업 생성) -> wait(완료 대기) -> collect(출력 검증/기록)"""
+
+    def __init__(self, input_path, output_path, s3_uri, role_arn, chunk_records=None, checkpoint_every=None,
+                 poll_seconds=None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.role_arn = role_arn
+        self.chunk_records = chunk_records or BATCH_CHUNK_RECORDS
+        self.checkpoint_every = checkpoint_every or BULK_CHECKPOINT_EVERY
+        self.poll_seconds = poll_seconds if poll_seconds is not None else BATCH_POLL_SECONDS
+        self.state = load_checkpoint(output_path, input_path, "batch")
+        if "runId" not in self.state:
+            bucket, prefix = parse_s3_uri(s3_uri)
+            run_id = time.strftime("bulk-%Y%m%d-%H%M%S")
+            self.state.update(
+                runId=run_id, phase="prepare", bucket=bucket, prefix=f"{prefix}/{run_id}" if prefix else run_id,
+                chunks=0, records=0, jobArn=None, object=0, objectLine=0,
+            )
+        self.s3 = aws_clients.get_client("s3")
+
+    @property
+    def offsets_path(self):
+        return self.output_path + OFFSETS_SUFFIX
+
+    def save(self):
+        save_checkpoint(self.output_path, self.state)
+
+    def run(self, wait=True):
+        """남은 단계를 실행하고 상태 반환 (wait=False 면 작업 생성 후 완료를 기다리지 않고 반환)"""
+        state = self.state
+        if state["done"]:
+            return state
+        if state["phase"] == "prepare":
+            self.prepare()
+        if state["phase"] == "submit":
+            self.submit()
+        if state["phase"] == "wait" and not self.wait(wait):
+            return state
+        if state["phase"] == "collect":
+            self.collect()
+        return state
+
+    def _upload_chunk(self, chunk):
+        chunk.seek(0)
+        key = f"{self.state['prefix']}/input/part-{self.state['chunks']:05d}.jsonl"
+        self.s3.put_object(Bucket=self.state["bucket"], Key=key, Body=chunk, ContentType="application/jsonl")
+        chunk.close()
+
+    def prepare(self):
+        """입력을 읽어 배치 추론 입력 파일(chunk_records 건씩)을 S3 에 올린다. 잘못된 항목은 바로 실패 줄로 쓴다"""
+        import tempfile
+        state = self.state
+        with open(self.input_path, "rb") as source, open_output(self.output_path, state["outputOffset"]) as out, \
+                open_output(self.offsets_path, (state["line"] - 1) * _OFFSET.size) as offsets:
+            source.seek(state["inputOffset"])
+            chunk, count, line, end = None, 0, state["line"] - 1, state["inputOffset"]
+            for line, start, end, record, error in read_records(source, state["line"]):
+                # 건너뛴 빈 줄 자리도 채워 줄 번호로 바로 찾을 수 있게 한다
+                offsets.seek((line - 1) * _OFFSET.size)
+                offsets.write(_OFFSET.pack(start))
+                try:
+                    if error is not None:
+                        raise ValueError(error)
+                    kind = backend.validate_item(record)
+                    model_input = batch_model_input(kind, record.get("name"), record["description"])
+                except ValueError as e:
+                    write_row(out, state, result_row(line, record, message=str(e)))
+                    continue
+                if chunk is None:
+                    chunk = tempfile.TemporaryFile()
+                chunk.write(f'{{"recordId": "{record_id(line)}", "modelInput": {model_input}}}\n'.encode("utf-8"))
+                count += 1
+                if count >= self.chunk_records:
+                    self._upload_chunk(chunk)
+                    out.flush()
+                    offsets.flush()
+                    state.update(line=line + 1, inputOffset=end, outputOffset=out.tell(),
+                                 chunks=state["chunks"] + 1, records=state["records"] + count)
+                    self.save()
+                    chunk, count = None, 0
+            if chunk is not None:
+                self._upload_chunk(chunk)
+                state.update(chunks=state["chunks"] + 1, records=state["records"] + count)
+            out.flush()
+            state.update(line=line + 1, inputOffset=end, outputOffset=out.tell(), phase="submit")
+        self.save()
+
+    def submit(self):
+        """배치 추론 작업 생성 (유효한 항목이 없으면 바로 완료)"""
+        state = self.state
+        if state["records"] == 0:
+            state.update(phase="done", done=True)
+            self.save()
+            return
+        if state["records"] < BATCH_MIN_RECORDS:
+            raise ValueError(
+                f"배치 추론 작업에는 최소 {BATCH_MIN_RECORDS}건이 필요합니다 (유효한 항목 {state['records']}건). "
+                f"체크포인트를 지우고 --mode ondemand 로 실행하세요."
+            )
+        if not self.role_arn:
+            raise ValueError("배치 추론에는 --role-arn (BULK_BATCH_ROLE_ARN) 이 필요합니다.")
+        location = f"s3://{state['bucket']}/{state['prefix']}"
+        response = aws_clients.get_client("batch").create_model_invocation_job(
+            jobName=state["runId"],
+            roleArn=self.role_arn,
+            modelId=backend.MODEL_ID,
+            inputDataConfig={"s3InputDataConfig": {"s3Uri": f"{location}/input/", "s3InputFormat": "JSONL"}},
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"{location}/output/"}},
+        )
+        state.update(jobArn=response["jobArn"], phase="wait")
+        self.save()
+        print(f"배치 추론 작업 생성: {state['jobArn']} ({state['records']}건)", file=sys.stderr)
+
+    def wait(self, block=True):
+        """작업이 끝날 때까지 상태 확인. 끝나면 True (block=False 면 한 번만 확인)"""
+        client = aws_clients.get_client("batch")
+        last_status = None
+        while True:
+            status = client.get_model_invocation_job(jobIdentifier=self.state["jobArn"])["status"]
+            if status != last_status:
+                print(f"배치 추론 작업 상태: {status}", file=sys.stderr)
+                last_status = status
+            if status in BATCH_DONE_STATUSES:
+                self.state["phase"] = "collect"
+                self.save()
+                return True
+            if status in BATCH_FAILED_STATUSES:
+                raise RuntimeError(f"배치 추론 작업이 {status} 상태로 끝났습니다: {self.state['jobArn']}")
+            if not block:
+                return False
+            time.sleep(self.poll_seconds)
+
+    def _output_keys(self):
+        """작업 출력 파일 키 목록 (입력 파일 이름 순서)"""
+        job_id = self.state["jobArn"].rsplit("/", 1)[-1]
+        prefix = f"{self.state['prefix']}/output/{job_id}/"
+        keys, token = [], None
+        while True:
+            page = self.s3.list_objects_v2(Bucket=self.state["bucket"], Prefix=prefix,
+                                           **({"ContinuationToken": token} if token else {}))
+            keys.extend(item["Key"] for item in page.get("Contents", ()) if item["Key"].endswith(".jsonl.out"))
+            if not page.get("IsTruncated"):
+                return sorted(keys)
+            token = page["NextContinuationToken"]
+
+    def _collect_row(self, source, offsets, row):
+        """배치 추론 출력 한 줄을 입력 항목과 맞춰 검증한 출력 줄로 변환"""
+        line = int(row["recordId"])
+        offsets.seek((line - 1) * _OFFSET.size)
+        source.seek(_OFFSET.unpack(offsets.read(_OFFSET.size))[0])
+        record = json.loads(source.readline())
+        kind, name, desc = record["kind"], record.get("name"), record["description"]
+        output = row.get("modelOutput")
+        try:
+            if output is None:
+                message = (row.get("error") or {}).get("errorMessage") or "배치 추론 결과가 없습니다."
+                if not backend.FALLBACK_ENABLED:
+                    return result_row(line, record, message=message)
+                print(f"{line}번째 줄 배치 추론 실패, 절차 생성 결과로 대체합니다: {message}", file=sys.stderr)
+                return result_row(line, record, result=json.loads(backend.generate_fallback(kind, name, desc, "degraded")),
+                                  fallback="degraded")
+            text, usage, _ = backend.parse_claude_response(output)
+            backend.add_usage_totals(usage)
+            result, fallback = backend.finish_stat(kind, name, desc, text, None)
+        except Exception as e:
+            print(f"{line}번째 줄 검증 중 오류 발생: {e}", file=sys.stderr)
+            return result_row(line, record, message=str(e))
+        return result_row(line, record, result=json.loads(result), fallback=fallback)
+
+    def collect(self):
+        """출력 파일을 한 줄씩 읽어 검증하고 결과 줄을 쓴다"""
+        state = self.state
+        with open(self.input_path, "rb") as source, open(self.offsets_path, "rb") as offsets, \
+                open_output(self.output_path, state["outputOffset"]) as out:
+            for index, key in enumerate(self._output_keys()):
+                if index < state["object"]:
+                    continue
+                body = self.s3.get_object(Bucket=state["bucket"], Key=key)["Body"]
+                for number, raw in enumerate(body.iter_lines()):
+                    if number < state["objectLine"] or not raw.strip():
+                        continue
+                    write_row(out, state, self._collect_row(source, offsets, json.loads(raw)))
+                    state["objectLine"] = number + 1
+                    if state["objectLine"] % self.checkpoint_every == 0:
+                        out.flush()
+                        state["outputOffset"] = out.tell()
+                        self.save()
+                out.flush()
+                state.update(object=index + 1, objectLine=0, outputOffset=out.tell())
+                self.save()
+        state.update(phase="done", done=True)
+        self.save()
+        os.remove(self.offsets_path)
+
+
+def install_fakes():
+    """로컬 Bedrock/S3/배치 추론 대역 설치 (작업 결과는 프로세스 메모리에만 있으므로 한 번에 끝까지 실행해야 함)"""
+    import fake_aws
+    runtime = fake_aws.FakeBedrockRuntime()
+    s3 = fake_aws.FakeS3()
+    aws_clients.set_client("text", runtime)
+    aws_clients.set_client("image", runtime)
+    aws_clients.set_client("s3", s3)
+    aws_clients.set_client("batch", fake_aws.FakeBedrock(runtime, s3, pending_polls=1))
+    return runtime, s3
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="JSONL 대량 스탯 생성 (체크포인트에서 이어서 실행)")
+    parser.add_argument("input", help="입력 JSONL ({\"kind\", \"name\", \"description\"} 한 줄에 하나)")
+    parser.add_argument("output", help="출력 JSONL (진행 상황은 <출력>.checkpoint)")
+    parser.add_argument("--mode", choices=("ondemand", "batch"), default="ondemand")
+    parser.add_argument("-c", "--concurrency", type=int, default=BULK_CONCURRENCY, help="온디맨드 동시 실행 수")
+    parser.add_argument("--checkpoint-every", type=int, default=BULK_CHECKPOINT_EVERY, help="체크포인트 간격 (항목 수)")
+    parser.add_argument("--s3-uri", default=os.environ.get("BULK_BATCH_S3_URI"), help="배치 추론 입력/출력 위치 (s3://bucket/prefix)")
+    parser.add_argument("--role-arn", default=os.environ.get("BULK_BATCH_ROLE_ARN"), help="배치 추론 작업의 IAM 역할")
+    parser.add_argument("--chunk-records", type=int, default=BATCH_CHUNK_RECORDS, help="배치 추론 입력 파일 하나의 레코드 수")
+    parser.add_argument("--poll-seconds", type=float, default=BATCH_POLL_SECONDS, help="배치 추론 작업 상태 확인 간격(초)")
+    parser.add_argument("--no-wait", action="store_true", help="배치 추론 작업을 만든 뒤 기다리지 않고 종료 (다시 실행하면 이어서 수집)")
+    parser.add_argument("--fake", action="store_true", help="fake_aws 대역으로 실행")
+    args = parser.parse_args(argv)
+
+    if args.fake:
+        install_fakes()
+        args.s3_uri = args.s3_uri or "s3://fake-bulk-bucket/bulk"
+        args.role_arn = args.role_arn or "arn:aws:iam::000000000000:role/fake-batch"
+        args.poll_seconds = 0
+    start = time.perf_counter()
+    try:
+        if args.mode == "ondemand":
+            state = run_ondemand(args.input, args.output, args.concurrency, args.checkpoint_every)
+        else:
+            if not os.path.exists(args.output + CHECKPOINT_SUFFIX) and not args.s3_uri:
+                parser.error("배치 추론에는 --s3-uri (BULK_BATCH_S3_URI) 가 필요합니다.")
+            pipeline = BatchPipeline(args.input, args.output, args.s3_uri, args.role_arn, args.chunk_records,
+                                     args.checkpoint_every, args.poll_seconds)
+            state = pipeline.run(wait=not args.no_wait)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        store = catalog.get_catalog()
+        if store is not None:
+            store.flush()
+
+    if not state["done"]:
+        print(f"배치 추론 작업 진행 중: {state['jobArn']} (같은 명령을 다시 실행하면 이어서 수집)", file=sys.stderr)
+        return state
+    print(
+        f"{state['succeeded'] + state['failed']}건 처리 (성공 {state['succeeded']}, 실패 {state['failed']}, "
+        f"절차 생성 대체 {state['fallbacks']}), {time.perf_counter() - start:.1f}초",
+        file=sys.stderr,
+    )
+    return state
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,460 @@
+"""
+catalog.py
+2026.10.17
+생성된 캐릭터/장비 기록 저장소 (기본 SQLite, 저장소 구현 교체 가능)
+
+검증을 통과한 생성 결과를 (종류, 정규화된 이름/설명 해시) 단위로 저장한다.
+같은 이름/설명으로 다시 생성하면 스탯과 이미지 URL 을 갱신하고 처음 생성 시각은 유지한다.
+스탯은 숫자 값마다 item_stats 행으로 펼쳐 (종류, 스탯, 값) 색인으로 범위 조회한다.
+    weapon: {"bonusType": "attackBonus", "bonusValue": 6, "effects": [{"type": "poison", "chance": 0.25, ...}]}
+    → attackBonus = 6, poison.chance = 0.25, ...
+
+CATALOG_PATH 나 CATALOG_BACKEND 를 설정한 경우에만 기록한다 (설정이 없으면 파일/스레드를 만들지 않음).
+Lambda 의 /tmp 는 컨테이너마다 따로 있고 컨테이너가 교체되면 사라지므로, 이전 세션 기록을 찾으려면 EFS 경로나
+register_catalog_backend 로 등록한 공유 저장소를 지정해야 한다.
+
+사용 예:
+    catalog = get_catalog()
+    catalog.find("weapon", {"attackBonus": (6, None)})       # attackBonus >= 6 인 무기
+    catalog.lookup("weapon", "맹독 단검", "독이 묻은 단검")
+    python catalog.py export items.jsonl --kind weapon      # 전체를 메모리에 올리지 않고 JSONL 로 내보내기
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+
+# CATALOG_BACKEND 만 지정했을 때의 저장 위치
+DEFAULT_CATALOG_PATH = "catalog.sqlite3"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS items ("
+    " id INTEGER PRIMARY KEY,"
+    " kind TEXT NOT NULL,"
+    " description_hash TEXT NOT NULL,"
+    " name TEXT,"
+    " description TEXT,"
+    " stats TEXT NOT NULL,"
+    " image_url TEXT,"
+    " thumbnail_url TEXT,"
+    " model_id TEXT,"
+    " created_at REAL NOT NULL,"
+    " updated_at REAL NOT NULL,"
+    " UNIQUE (kind, description_hash))",
+    "CREATE INDEX IF NOT EXISTS idx_items_kind_updated ON items(kind, updated_at)",
+    "CREATE TABLE IF NOT EXISTS item_stats ("
+    " item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,"
+    " kind TEXT NOT NULL,"
+    " stat TEXT NOT NULL,"
+    " value REAL NOT NULL,"
+    " PRIMARY KEY (item_id, stat))",
+    "CREATE INDEX IF NOT EXISTS idx_item_stats_range ON item_stats(kind, stat, value)",
+)
+
+_ITEM_COLUMNS = "id, kind, description_hash, name, description, stats, image_url, thumbnail_url, model_id, created_at, updated_at"
+
+
+def normalize_text(text):
+    """공백을 하나로 줄이고 대소문자를 무시한 비교용 문자열"""
+    return " ".join(str(text or "").split()).casefold()
+
+
+def description_hash(name, description):
+    """정규화된 이름/설명 해시 (같은 아이템을 다시 찾는 키)"""
+    raw = normalize_text(name) + "\n" + normalize_text(description)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def flatten_stats(data):
+    """검증된 결과에서 범위 조회용 (스탯 이름, 숫자 값) 목록 추출.
+    최상위 숫자 값, 장비의 bonusType → bonusValue, 효과별 숫자 값(<type>.<필드>)을 펼친다"""
+    rows = {}
+    for key, value in data.items():
+        if _is_number(value):
+            rows[key] = value
+    if isinstance(data.get("bonusType"), str) and _is_number(data.get("bonusValue")):
+        rows[data["bonusType"]] = data["bonusValue"]
+    for effect in data.get("effects") or ():
+        if not isinstance(effect, dict) or not isinstance(effect.get("type"), str):
+            continue
+        for key, value in effect.items():
+            if _is_number(value):
+                rows[f"{effect['type']}.{key}"] = value
+    return list(rows.items())
+
+
+class SQLiteCatalog:
+    """SQLite 저장소. 여러 스레드에서 연결 하나를 락으로 나눠 쓴다"""
+
+    def __init__(self, path):
+        # 카탈로그를 처음 쓸 때만 필요하므로 여기서 불러옴
+        import sqlite3
+        self.Error = sqlite3.Error
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    @staticmethod
+    def _to_record(row):
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "descriptionHash": row[2],
+            "name": row[3],
+            "description": row[4],
+            "stats": json.loads(row[5]),
+            "imageUrl": row[6],
+            "thumbnailUrl": row[7],
+            "modelId": row[8],
+            "createdAt": row[9],
+            "updatedAt": row[10],
+        }
+
+    def upsert(self, record):
+        """기록 하나 저장 후 id 반환"""
+        return self.upsert_many([record])[0]
+
+    def upsert_many(self, records):
+        """기록을 한 트랜잭션으로 저장하고 id 목록 반환.
+        같은 (종류, 해시)가 있으면 스탯/이미지를 갱신하고, imageUrl / thumbnailUrl 이 None 이면 기존 값을 유지한다"""
+        with self._lock, self._conn:
+            return [self._upsert(record) for record in records]
+
+    def _upsert(self, record):
+        now = record.get("updatedAt") or time.time()
+        stats_json = json.dumps(record["stats"], ensure_ascii=False)
+        params = (
+            record.get("name"), record.get("description"), stats_json,
+            record.get("imageUrl"), record.get("thumbnailUrl"), record.get("modelId"),
+        )
+        # 오래된 SQLite(Lambda 런타임 일부)는 UPSERT 구문을 지원하지 않으므로 조회 후 갱신/삽입
+        row = self._conn.execute(
+            "SELECT id FROM items WHERE kind = ? AND description_hash = ?",
+            (record["kind"], record["descriptionHash"]),
+        ).fetchone()
+        if row is not None:
+            item_id = row[0]
+            self._conn.execute(
+                "UPDATE items SET name = ?, description = ?, stats = ?,"
+                " image_url = COALESCE(?, image_url), thumbnail_url = COALESCE(?, thumbnail_url),"
+                " model_id = ?, updated_at = ? WHERE id = ?",
+                params + (now, item_id),
+            )
+        else:
+            item_id = self._conn.execute(
+                "INSERT INTO items (name, description, stats, image_url, thumbnail_url, model_id,"
+                " kind, description_hash, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                params + (record["kind"], record["descriptionHash"], now, now),
+            ).lastrowid
+        self._conn.execute("DELETE FROM item_stats WHERE item_id = ?", (item_id,))
+        self._conn.executemany(
+            "INSERT INTO item_stats (item_id, kind, stat, value) VALUES (?, ?, ?, ?)",
+            [(item_id, record["kind"], stat, value) for stat, value in flatten_stats(record["stats"])],
+        )
+        return item_id
+
+    def get(self, kind, digest):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_ITEM_COLUMNS} FROM items WHERE kind = ? AND description_hash = ?", (kind, digest)
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def find(self, kind=None, ranges=None, limit=100):
+        """ranges: {스탯 이름: (최솟값 또는 None, 최댓값 또는 None)}. 조건을 모두 만족하는 기록을 최근 갱신 순으로 반환"""
+        joins, where, params = [], [], []
+        for i, (stat, (low, high)) in enumerate((ranges or {}).items()):
+            alias = f"s{i}"
+            conditions = [f"{alias}.item_id = items.id", f"{alias}.stat = ?"]
+            params.append(stat)
+            if kind is not None:
+                # (kind, stat, value) 색인을 타도록 종류 조건도 함께 건다
+                conditions.append(f"{alias}.kind = ?")
+                params.append(kind)
+            if low is not None:
+                conditions.append(f"{alias}.value >= ?")
+                params.append(low)
+            if high is not None:
+                conditions.append(f"{alias}.value <= ?")
+                params.append(high)
+            joins.append(f"JOIN item_stats {alias} ON " + " AND ".join(conditions))
+        if kind is not None:
+            where.append("items.kind = ?")
+            params.append(kind)
+        sql = f"SELECT {', '.join('items.' + c.strip() for c in _ITEM_COLUMNS.split(','))} FROM items " + " ".join(joins)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY items.updated_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def iter_items(self, kind=None, batch_size=500):
+        """기록을 id 순으로 batch_size 개씩 읽어 하나씩 yield (전체를 메모리에 올리지 않음)"""
+        last_id = 0
+        while True:
+            sql = f"SELECT {_ITEM_COLUMNS} FROM items WHERE id > ?"
+            params = [last_id]
+            if kind is not None:
+                sql += " AND kind = ?"
+                params.append(kind)
+            sql += " ORDER BY id LIMIT ?"
+            params.append(batch_size)
+            # 페이지마다 락을 놓아 내보내는 동안에도 기록할 수 있게 한다
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_record(row)
+            last_id = rows[-1][0]
+
+    def count(self, kind=None):
+        with self._lock:
+            if kind is None:
+                return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM items WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 저장소 구현 (CATALOG_BACKEND 로 선택). factory(path) → upsert/get/find/iter_items/count/close 를 가진 객체
+CATALOG_BACKENDS = {"sqlite": SQLiteCatalog}
+
+
+def register_catalog_backend(name, factory):
+    """저장소 구현 등록 (예: 공유 DB 를 쓰는 구현)"""
+    CATALOG_BACKENDS[name] = factory
+
+
+class Catalog:
+    """생성 결과 기록. 기록은 큐에 넣고 백그라운드 스레드가 모아서 한 트랜잭션으로 저장한다 (요청 경로에서 DB 를 기다리지 않음).
+    저장소는 처음 사용할 때 열고, 저장소 오류는 출력만 하고 생성 흐름을 막지 않는다.
+    조회 전에는 대기 중인 기록을 먼저 저장한다. 큐가 가득 차면 기록을 버리고 dropped 를 센다"""
+
+    def __init__(self, backend_name="sqlite", path=DEFAULT_CATALOG_PATH, queue_size=1024, batch_size=100):
+        if backend_name not in CATALOG_BACKENDS:
+            raise ValueError(f"'{backend_name}'는 유효한 카탈로그 저장소가 아닙니다.")
+        self.backend_name = backend_name
+        self.path = path
+        self.batch_size = batch_size
+        self._store = None
+        self._failed = False
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self.recorded = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls):
+        """환경 변수로 구성 (CATALOG_PATH/CATALOG_BACKEND 가 없거나 CATALOG_ENABLED=0 이면 None)"""
+        if os.environ.get("CATALOG_ENABLED", "1") == "0":
+            return None
+        if not os.environ.get("CATALOG_PATH") and not os.environ.get("CATALOG_BACKEND"):
+            return None
+        return cls(
+            backend_name=os.environ.get("CATALOG_BACKEND", "sqlite"),
+            path=os.environ.get("CATALOG_PATH", DEFAULT_CATALOG_PATH),
+            queue_size=int(os.environ.get("CATALOG_QUEUE_SIZE", "1024")),
+        )
+
+    @property
+    def store(self):
+        """저장소 객체 (열 수 없으면 None)"""
+        if self._store is None and not self._failed:
+            with self._lock:
+                if self._store is None and not self._failed:
+                    try:
+                        self._store = CATALOG_BACKENDS[self.backend_name](self.path)
+                    except Exception as e:
+                        print(f"카탈로그 저장소를 열 수 없어 기록하지 않습니다: {e}")
+                        self._failed = True
+        return self._store
+
+    def record(self, kind, name, description, data, image_url=None, thumbnail_url=None, model_id=None):
+        """검증된 생성 결과를 저장 대기열에 추가. 대기열에 넣었으면 True"""
+        if self._failed:
+            return False
+        record = {
+            "kind": kind,
+            "descriptionHash": description_hash(name, description),
+            "name": name,
+            "description": description,
+            # 호출자가 이후에 dict 를 고쳐도(이미지 URL 추가 등) 기록은 바뀌지 않도록 복사
+            "stats": dict(data),
+            "imageUrl": image_url,
+            "thumbnailUrl": thumbnail_url,
+            "modelId": model_id,
+            "updatedAt": time.time(),
+        }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        if self._writer is None:
+            self._start_writer()
+        return True
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="catalog-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                store = self.store
+                if store is not None:
+                    store.upsert_many(batch)
+                    self.recorded += len(batch)
+            except Exception as e:
+                self.errors += 1
+                print(f"카탈로그 기록 중 오류 발생: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """대기 중인 기록을 모두 저장할 때까지 기다림"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def lookup(self, kind, name, description):
+        """같은 종류/이름/설명(공백, 대소문자 무시)으로 만든 기록 반환 (없으면 None)"""
+        self.flush()
+        store = self.store
+        return store.get(kind, description_hash(name, description)) if store is not None else None
+
+    def find(self, kind=None, ranges=None, limit=100):
+        self.flush()
+        store = self.store
+        return store.find(kind, ranges, limit) if store is not None else []
+
+    def iter_items(self, kind=None, batch_size=500):
+        self.flush()
+        store = self.store
+        return store.iter_items(kind, batch_size) if store is not None else iter(())
+
+    def export_jsonl(self, fp, kind=None, batch_size=500):
+        """기록을 JSON Lines 로 스트리밍 출력. 내보낸 개수 반환"""
+        count = 0
+        for record in self.iter_items(kind, batch_size):
+            fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    def stats(self):
+        return {
+            "recorded": self.recorded,
+            "pending": self._queue.qsize(),
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "available": self.store is not None,
+        }
+
+
+_catalog = None
+_catalog_loaded = False
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """프로세스 공유 카탈로그 반환 (설정되지 않았으면 None)"""
+    global _catalog, _catalog_loaded
+    if not _catalog_loaded:
+        with _catalog_lock:
+            if not _catalog_loaded:
+                _catalog = Catalog.from_env()
+                _catalog_loaded = True
+    return _catalog
+
+
+def set_catalog(catalog):
+    """공유 카탈로그 교체 (None 이면 기록하지 않음)"""
+    global _catalog, _catalog_loaded
+    with _catalog_lock:
+        _catalog = catalog
+        _catalog_loaded = True
+
+
+def record_result(kind, name, description, data, image_url=None, thumbnail_url=None, model_id=None):
+    """공유 카탈로그에 기록 (비활성화되어 있으면 아무 일도 하지 않음)"""
+    catalog = get_catalog()
+    if catalog is None:
+        return False
+    return catalog.record(kind, name, description, data, image_url, thumbnail_url, model_id)
+
+
+def parse_range(text):
+    """"attackBonus>=6", "hp<=120", "speed=50" 형식의 조건을 (스탯, (최솟값, 최댓값))으로 변환"""
+    for op in (">=", "<=", "="):
+        stat, sep, value = text.partition(op)
+        if sep:
+            value = float(value)
+            if op == ">=":
+                return stat.strip(), (value, None)
+            if op == "<=":
+                return stat.strip(), (None, value)
+            return stat.strip(), (value, value)
+    raise ValueError(f"'{text}'는 올바른 스탯 조건이 아닙니다. (예: attackBonus>=6)")
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="생성 기록 카탈로그 조회/내보내기")
+    parser.add_argument("--path", help="SQLite 파일 경로 (생략 시 CATALOG_PATH)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="JSON Lines 로 내보내기")
+    export.add_argument("output", nargs="?", help="출력 파일 (생략 시 표준 출력)")
+    export.add_argument("--kind")
+    find = sub.add_parser("find", help="스탯 범위로 조회")
+    find.add_argument("--kind")
+    find.add_argument("conditions", nargs="*", help='스탯 조건 (예: "attackBonus>=6")')
+    find.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    catalog = Catalog(path=args.path) if args.path else get_catalog()
+    if catalog is None:
+        parser.error("카탈로그가 설정되지 않았습니다. --path 나 CATALOG_PATH/CATALOG_BACKEND 를 지정하세요.")
+    if args.command == "export":
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                count = catalog.export_jsonl(f, args.kind)
+        else:
+            count = catalog.export_jsonl(sys.stdout, args.kind)
+        print(f"{count}건 내보냄", file=sys.stderr)
+    else:
+        ranges = dict(parse_range(condition) for condition in args.conditions)
+        for record in catalog.find(args.kind, ranges, args.limit):
+            print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
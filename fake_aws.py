@@ -0,0 +1,478 @@
+"""
+fake_aws.py
+2026.10.17
+네트워크 없이 backend / lambda_function 을 실행하기 위한 로컬 Bedrock 대역(stub)
+
+사용 예:
+    import aws_clients, backend, fake_aws
+    fake = fake_aws.FakeBedrockRuntime()
+    aws_clients.set_client("text", fake)
+    aws_clients.set_client("image", fake)
+    aws_clients.set_client("s3", fake_aws.FakeS3())
+    backend.generate_stat_with_meta("weapon", "맹독 단검", "독이 묻은 단검")
+
+요청 본문은 실제 Bedrock 처럼 검사하며, 형식이 잘못되면 ValidationException 과 같은 이름의 예외를 던진다.
+latency / throttle_rate 로 응답 지연과 스로틀링(재시도 포함)을 흉내 낼 수 있다 (benchmark.py 참고).
+"""
+import base64
+import hashlib
+import io
+import itertools
+import json
+import random
+import threading
+import time
+
+# 1x1 투명 PNG
+TINY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+DEFAULT_CHARACTER_OUTPUT = """{
+  "hp": 150,
+  "hp_reason": "언뜻 보기에도 바위처럼 단단한 느낌이야.",
+  "attack": 18,
+  "attack_reason": "공격할 때마다 땅이 흔들릴 것 같은 위압감!",
+  "defense": 12,
+  "criticalChance": 0.18,
+  "criticalDamage": 2.0,
+  "speed": 60,
+  "speed_reason": "긴 다리로 넓은 평원을 가볍게 달릴 것 같은 상상.",
+  "dodgeChance": 0.12,
+  "accuracy": 0.9
+}"""
+
+DEFAULT_EQUIPMENT_OUTPUT = """{
+  "bonusType": "attackBonus",
+  "bonusValue": 6,
+  "effects": [
+    {
+      "type": "poison",
+      "typeReason": "독이라니, 진짜 상대방 고생 좀 하겠는데?",
+      "chance": 0.25,
+      "duration": 3,
+      "bonusIncreasePerTurn": 5
+    }
+  ]
+}"""
+
+DEFAULT_TRANSLATION_OUTPUT = "A venomous dagger with a sharp, glowing blade"
+
+
+class FakeClientError(Exception):
+    """botocore ClientError 대역 (response["Error"]["Code"] 제공)"""
+
+    def __init__(self, code, message, status_code=400):
+        super().__init__(f"An error occurred ({code}): {message}")
+        self.response = {
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"HTTPStatusCode": status_code},
+        }
+
+
+class ValidationException(FakeClientError):
+    """Bedrock 의 ValidationException 대역"""
+
+    def __init__(self, message):
+        super().__init__("ValidationException", message)
+
+
+class ThrottlingException(FakeClientError):
+    """재시도 횟수를 모두 쓰고도 스로틀링된 경우의 대역"""
+
+    def __init__(self, code="ThrottlingException", message="Too many requests, please wait before trying again."):
+        super().__init__(code, message, 429)
+
+
+class _Body:
+    """boto3 StreamingBody 대역"""
+
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def read(self, *args):
+        return self._stream.read(*args)
+
+    def close(self):
+        self._stream.close()
+
+    def iter_lines(self, chunk_size=1024, keepends=False):
+        for line in self._stream:
+            yield line if keepends else line.rstrip(b"\r\n")
+
+
+class _EventStream:
+    """invoke_model_with_response_stream 의 EventStream 대역"""
+
+    def __init__(self, events):
+        self._events = events
+        self.closed = False
+        self.consumed = 0
+
+    def __iter__(self):
+        for event in self._events:
+            if self.closed:
+                return
+            self.consumed += 1
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+def estimate_tokens(text):
+    """토큰 수 대략 추정 (한글 기준 약 2~3자당 1토큰)"""
+    return max(1, len(text) // 3)
+
+
+def apply_stop_conditions(request, output_text):
+    """요청의 stop_sequences / max_tokens 를 적용해 (잘린 출력, stop_reason, stop_sequence) 반환.
+    실제 Claude 처럼 먼저 만난 조건에서 멈추며, 일치한 stop_sequence 는 출력에 포함하지 않는다"""
+    stop_at, matched = None, None
+    for sequence in request.get("stop_sequences") or ():
+        index = output_text.find(sequence)
+        if index >= 0 and (stop_at is None or index < stop_at):
+            stop_at, matched = index, sequence
+    # estimate_tokens 와 같은 기준 (약 3자당 1토큰)
+    limit = request["max_tokens"] * 3
+    if stop_at is not None and stop_at + len(matched) <= limit:
+        return output_text[:stop_at], "stop_sequence", matched
+    if estimate_tokens(output_text) > request["max_tokens"]:
+        return output_text[:limit], "max_tokens", None
+    return output_text, "end_turn", None
+
+
+def validate_claude_request(body):
+    """Anthropic Messages 요청 본문 형식 검사 후 dict 반환"""
+    try:
+        data = json.loads(body)
+    except (TypeError, ValueError):
+        raise ValidationException("요청 본문이 JSON이 아닙니다.")
+    if data.get("anthropic_version") != "bedrock-2023-05-31":
+        raise ValidationException("anthropic_version 이 올바르지 않습니다.")
+    if not isinstance(data.get("max_tokens"), int) or data["max_tokens"] <= 0:
+        raise ValidationException("max_tokens 는 양의 정수여야 합니다.")
+    stop_sequences = data.get("stop_sequences", [])
+    if not isinstance(stop_sequences, list) or not all(isinstance(s, str) and s.strip() for s in stop_sequences):
+        raise ValidationException("stop_sequences 는 공백이 아닌 문자열 목록이어야 합니다.")
+    system = data.get("system", [])
+    if isinstance(system, str):
+        system = [{"type": "text", "text": system}]
+    for block in system:
+        if block.get("type") != "text" or not isinstance(block.get("text"), str):
+            raise ValidationException("system 블록 형식이 올바르지 않습니다.")
+        cache_control = block.get("cache_control")
+        if cache_control is not None and cache_control != {"type": "ephemeral"}:
+            raise ValidationException("cache_control 형식이 올바르지 않습니다.")
+    messages = data.get("messages")
+    if not isinstance(messages, list) or not messages or messages[0].get("role") != "user":
+        raise ValidationException("messages 는 user 메시지로 시작해야 합니다.")
+    for message in messages:
+        if message.get("role") not in ("user", "assistant"):
+            raise ValidationException("message role 이 올바르지 않습니다.")
+        content = message.get("content")
+        if isinstance(content, str):
+            continue
+        if not isinstance(content, list) or not all(isinstance(part.get("text"), str) for part in content):
+            raise ValidationException("message content 형식이 올바르지 않습니다.")
+    data["system"] = system
+    return data
+
+
+def request_category(request):
+    """요청 종류 판별 ("character" / "equipment" / "translation")"""
+    system_text = "".join(block["text"] for block in request.get("system", []))
+    if "캐릭터 생성기" in system_text:
+        return "character"
+    if "정보 생성기" in system_text:
+        return "equipment"
+    return "translation"
+
+
+DEFAULT_RECORDINGS = {
+    "character": [DEFAULT_CHARACTER_OUTPUT],
+    "equipment": [DEFAULT_EQUIPMENT_OUTPUT],
+    "translation": [DEFAULT_TRANSLATION_OUTPUT],
+}
+
+
+def default_responder(model_id, request):
+    """요청의 system/user 텍스트를 보고 그럴듯한 출력을 고름"""
+    return DEFAULT_RECORDINGS[request_category(request)][0]
+
+
+def replay_responder(recordings):
+    """기록된 응답을 종류별로 순서대로 돌려가며 재생하는 responder 생성.
+    recordings: {"character": [출력 텍스트, ...], "equipment": [...], "translation": [...]} (빠진 종류는 기본 출력 사용)"""
+    cycles = {
+        category: itertools.cycle(recordings.get(category) or outputs)
+        for category, outputs in DEFAULT_RECORDINGS.items()
+    }
+    lock = threading.Lock()
+
+    def responder(model_id, request):
+        with lock:
+            return next(cycles[request_category(request)])
+    return responder
+
+
+def load_recordings(path):
+    """JSON 파일에 저장된 기록 응답을 읽어 replay_responder 생성"""
+    with open(path, encoding="utf-8") as f:
+        return replay_responder(json.load(f))
+
+
+class _FaultInjector:
+    """응답 지연(latency ± jitter)과 스로틀링을 흉내 내는 공통 부분.
+    스로틀링된 시도는 boto3 재시도처럼 지수 백오프 후 다시 시도하고, max_attempts 를 모두 쓰면 예외를 던진다."""
+
+    throttle_code = "ThrottlingException"
+
+    def __init__(self, latency=0.0, jitter=0.0, throttle_rate=0.0, max_attempts=1, retry_backoff=0.02, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _uniform(self):
+        with self._random_lock:
+            return self._random.random()
+
+    def _delay(self, latency):
+        if latency > 0:
+            time.sleep(latency * (1 + self.jitter * (2 * self._uniform() - 1)))
+
+    def _simulate_call(self, latency=None):
+        """지연/스로틀링 적용 후 재시도 횟수 반환"""
+        for attempt in range(self.max_attempts):
+            if self.throttle_rate and self._uniform() < self.throttle_rate:
+                self.throttled += 1
+                if attempt + 1 < self.max_attempts:
+                    time.sleep(self.retry_backoff * (2 ** attempt))
+                continue
+            self._delay(self.latency if latency is None else latency)
+            return attempt
+        raise ThrottlingException(self.throttle_code)
+
+    @staticmethod
+    def _metadata(retry_attempts, status_code=200):
+        return {"HTTPStatusCode": status_code, "RetryAttempts": retry_attempts}
+
+
+class FakeBedrockRuntime(_FaultInjector):
+    """bedrock-runtime 클라이언트 대역.
+    cache_control 이 붙은 system 블록은 처음 보면 캐시 쓰기, 이후에는 캐시 읽기 토큰으로 계산한다.
+    responder(model_id, request_dict) 로 출력 텍스트를 바꿀 수 있다.
+    latency 는 텍스트 호출, image_latency 는 이미지 호출 지연(초, None 이면 latency 와 같음)."""
+
+    def __init__(self, responder=None, image_latency=None, **faults):
+        super().__init__(**faults)
+        self.responder = responder or default_responder
+        self.image_latency = image_latency
+        self.requests = []
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+
+    def _usage(self, request, output_text):
+        cache_read = cache_write = uncached = 0
+        for block in request.get("system", []):
+            tokens = estimate_tokens(block["text"])
+            if block.get("cache_control"):
+                digest = hashlib.sha256(block["text"].encode("utf-8")).hexdigest()
+                with self._lock:
+                    hit = digest in self._cached_prefixes
+                    self._cached_prefixes.add(digest)
+                if hit:
+                    cache_read += tokens
+                else:
+                    cache_write += tokens
+            else:
+                uncached += tokens
+        for message in request["messages"]:
+            content = message["content"]
+            text = content if isinstance(content, str) else "".join(part["text"] for part in content)
+            uncached += estimate_tokens(text)
+        return {
+            "input_tokens": uncached,
+            "output_tokens": estimate_tokens(output_text),
+            "cache_read_input_tokens": cache_read,
+            "cache_creation_input_tokens": cache_write,
+        }
+
+    def _invoke_claude(self, modelId, body):
+        request = validate_claude_request(body)
+        with self._lock:
+            self.requests.append({"modelId": modelId, "body": request})
+        output_text, stop_reason, stop_sequence = apply_stop_conditions(request, self.responder(modelId, request))
+        usage = self._usage(request, output_text + (stop_sequence or ""))
+        return output_text, usage, stop_reason, stop_sequence
+
+    def _invoke_titan(self, modelId, body):
+        request = json.loads(body)
+        if request.get("taskType") != "TEXT_IMAGE" or not request.get("textToImageParams", {}).get("text"):
+            raise ValidationException("Titan 요청 형식이 올바르지 않습니다.")
+        with self._lock:
+            self.requests.append({"modelId": modelId, "body": request})
+        count = request.get("imageGenerationConfig", {}).get("numberOfImages", 1)
+        images = [base64.b64encode(TINY_PNG).decode("ascii")] * count
+        return {"images": images}
+
+    def invoke_model(self, modelId, body, **kwargs):
+        if "titan-image" in modelId or "nova-canvas" in modelId:
+            payload = self._invoke_titan(modelId, body)
+            retries = self._simulate_call(self.image_latency)
+        else:
+            retries = self._simulate_call()
+            output_text, usage, stop_reason, stop_sequence = self._invoke_claude(modelId, body)
+            payload = {
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": output_text}],
+                "stop_reason": stop_reason,
+                "stop_sequence": stop_sequence,
+                "usage": usage,
+            }
+        data = json.dumps(payload).encode("utf-8")
+        return {"body": _Body(data), "contentType": "application/json", "ResponseMetadata": self._metadata(retries)}
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        retries = self._simulate_call()
+        output_text, usage, stop_reason, stop_sequence = self._invoke_claude(modelId, body)
+        events = [{"type": "message_start", "message": {"usage": {"input_tokens": usage["input_tokens"]}}}]
+        # 몇 글자씩 나눠서 델타 이벤트로 전송
+        for i in range(0, len(output_text), 8):
+            events.append({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": output_text[i:i + 8]}})
+        events.append({"type": "message_delta", "delta": {"stop_reason": stop_reason, "stop_sequence": stop_sequence}, "usage": {"output_tokens": usage["output_tokens"]}})
+        events.append({"type": "message_stop"})
+        stream = _EventStream([{"chunk": {"bytes": json.dumps(event).encode("utf-8")}} for event in events])
+        return {"body": stream, "ResponseMetadata": self._metadata(retries)}
+
+
+class FakeS3(_FaultInjector):
+    """S3 클라이언트 대역 (put_object / head_bucket / head_object / get_object / list_objects_v2). 업로드된 객체는 메모리에 보관한다."""
+
+    throttle_code = "SlowDown"
+
+    def __init__(self, **faults):
+        super().__init__(**faults)
+        self.objects = {}
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        retries = self._simulate_call()
+        data = Body if isinstance(Body, bytes) else Body.read()
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        extra = {name: value for name, value in kwargs.items() if name in ("ContentType", "CacheControl", "Metadata")}
+        with self._lock:
+            self.objects[(Bucket, Key)] = dict(extra, Body=data, ETag=etag, ContentLength=len(data))
+        return {"ETag": etag, "ResponseMetadata": self._metadata(retries)}
+
+    def _get(self, Bucket, Key):
+        with self._lock:
+            obj = self.objects.get((Bucket, Key))
+        if obj is None:
+            raise FakeClientError("404", "Not Found", 404)
+        return obj
+
+    def head_bucket(self, Bucket, **kwargs):
+        return {"ResponseMetadata": self._metadata(self._simulate_call())}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        retries = self._simulate_call()
+        obj = self._get(Bucket, Key)
+        head = {name: value for name, value in obj.items() if name != "Body"}
+        head["ResponseMetadata"] = self._metadata(retries)
+        return head
+
+    def get_object(self, Bucket, Key, **kwargs):
+        retries = self._simulate_call()
+        obj = dict(self._get(Bucket, Key))
+        obj["Body"] = _Body(obj["Body"])
+        obj["ResponseMetadata"] = self._metadata(retries)
+        return obj
+
+    def list_objects_v2(self, Bucket, Prefix="", ContinuationToken=None, MaxKeys=1000, **kwargs):
+        retries = self._simulate_call()
+        with self._lock:
+            keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + MaxKeys]
+        response = {
+            "Contents": [{"Key": key, "Size": self.objects[(Bucket, key)]["ContentLength"]} for key in page],
+            "KeyCount": len(page),
+            "IsTruncated": start + MaxKeys < len(keys),
+            "ResponseMetadata": self._metadata(retries),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        return response
+
+
+def _parse_s3_uri(uri):
+    """"s3://bucket/prefix" 를 (bucket, prefix) 로 분리"""
+    bucket, _, prefix = uri[len("s3://"):].partition("/")
+    return bucket, prefix
+
+
+class FakeBedrock:
+    """bedrock(컨트롤 플레인) 클라이언트의 배치 추론 대역 (create_model_invocation_job / get_model_invocation_job).
+    작업을 만들면 s3 의 입력 JSONL 을 runtime.invoke_model 로 한 줄씩 처리하고, 실제 배치 추론처럼
+    <출력 s3Uri>/<작업 ID>/<입력 파일 이름>.out 에 {"recordId", "modelInput", "modelOutput" | "error"} 줄을 쓴다.
+    get_model_invocation_job 은 pending_polls 번 "InProgress" 를 반환한 뒤 최종 상태를 반환한다."""
+
+    def __init__(self, runtime, s3, pending_polls=1):
+        self.runtime = runtime
+        self.s3 = s3
+        self.pending_polls = pending_polls
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def create_model_invocation_job(self, jobName, roleArn, modelId, inputDataConfig, outputDataConfig, **kwargs):
+        if not roleArn.startswith("arn:"):
+            raise ValidationException("roleArn 형식이 올바르지 않습니다.")
+        with self._lock:
+            job_id = f"job{len(self.jobs) + 1:08d}"
+        input_bucket, input_prefix = _parse_s3_uri(inputDataConfig["s3InputDataConfig"]["s3Uri"])
+        output_bucket, output_prefix = _parse_s3_uri(outputDataConfig["s3OutputDataConfig"]["s3Uri"])
+        output_prefix = output_prefix.rstrip("/") + "/" if output_prefix else ""
+        failed = 0
+        for item in self.s3.list_objects_v2(Bucket=input_bucket, Prefix=input_prefix, MaxKeys=100000)["Contents"]:
+            lines = []
+            for line in self.s3.get_object(Bucket=input_bucket, Key=item["Key"])["Body"].iter_lines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                row = {"recordId": record.get("recordId"), "modelInput": record["modelInput"]}
+                try:
+                    response = self.runtime.invoke_model(modelId=modelId, body=json.dumps(record["modelInput"]))
+                    row["modelOutput"] = json.loads(response["body"].read())
+                except FakeClientError as e:
+                    failed += 1
+                    row["error"] = {"errorCode": 400, "errorMessage": str(e)}
+                lines.append(json.dumps(row, ensure_ascii=False))
+            name = item["Key"].rsplit("/", 1)[-1]
+            body = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+            self.s3.put_object(Bucket=output_bucket, Key=f"{output_prefix}{job_id}/{name}.out", Body=body)
+        job_arn = f"arn:aws:bedrock:us-east-1:000000000000:model-invocation-job/{job_id}"
+        with self._lock:
+            self.jobs[job_arn] = {
+                "jobArn": job_arn,
+                "jobName": jobName,
+                "modelId": modelId,
+                "status": "PartiallyCompleted" if failed else "Completed",
+                "polls": 0,
+            }
+        return {"jobArn": job_arn}
+
+    def get_model_invocation_job(self, jobIdentifier, **kwargs):
+        with self._lock:
+            job = self.jobs.get(jobIdentifier)
+            if job is None:
+                raise FakeClientError("ResourceNotFoundException", "작업이 없습니다.", 404)
+            job["polls"] += 1
+            status = "InProgress" if job["polls"] <= self.pending_polls else job["status"]
+        return {"jobArn": jobIdentifier, "jobName": job["jobName"], "modelId": job["modelId"], "status": status}
@@ -15,10 +15,18 @@ with left_col:
     name = st.text_input("캐릭터 이름", value="엘라", key="char_name")
     char_desc = st.text_area("캐릭터 설명", value="용감하고 빠른 도적. 치명타와 회피에 능함.", key="char_desc")
     if st.button("캐릭터 스탯 생성", key="make_char"):
-        with st.spinner("캐릭터 스탯 생성 중..."):
-            result = be.generate_character_stat(name, char_desc)
-            st.success("캐릭터 스탯 결과:")
-            st.code(result, language="json")
+        # 생성 중인 JSON을 토큰 단위로 바로 보여주고, 완료되면 검증된 결과로 교체
+        placeholder = st.empty()
+        partial = ""
+        result = None
+        for event, text in be.stream_character_stat(name, char_desc):
+            if event == "delta":
+                partial += text
+                placeholder.code(partial, language="json")
+            else:
+                result = text
+        st.success("캐릭터 스탯 결과:")
+        placeholder.code(result, language="json")
 
 # --- 무기 생성 (오른쪽) ---
 with right_col:
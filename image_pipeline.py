@@ -0,0 +1,126 @@
+"""
+image_pipeline.py
+2026.10.17
+장비 이미지 경로 (번역 → Titan → 후처리 → S3 업로드)
+
+캐릭터 요청은 이미지를 쓰지 않으므로 lambda_function 은 장비 요청이 처음 들어올 때 이 모듈을 불러온다.
+"""
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import image_processing
+import tracing
+from aws_clients import get_client
+from backend import build_image_request, choose_image_variant, image_request_digest, invoke_image_model
+from image_store import ImageStore
+from singleflight import SingleFlight
+
+BUCKET_NAME = 'inha-pj-03-s3-img'
+
+# 생성된 이미지 색인 (같은 프롬프트/파라미터의 이미지는 다시 생성하지 않고 재사용)
+image_store = ImageStore.from_env(BUCKET_NAME)
+
+# warm 컨테이너에서 재사용되는 작업 스레드 풀
+_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("EQUIPMENT_WORKERS", "4")))
+
+# 동시에 들어온 같은 장비의 이미지 생성/업로드는 한 번만 실행하고 URL 공유
+image_flight = SingleFlight.from_env()
+
+
+def upload_image(image_bytes, file_name=None, content_type='image/jpeg', cache_control=None):
+    """이미지를 S3에 업로드하고 URL 반환 (실패 시 None). file_name 이 없으면 임의의 이름 사용"""
+    try:
+        file_name = file_name or str(uuid.uuid4()) + ".jpg"
+        extra = {"CacheControl": cache_control} if cache_control else {}
+
+        with tracing.span("s3.put_object", bytes=len(image_bytes)) as span:
+            response = get_client("s3").put_object(
+                Bucket=BUCKET_NAME,
+                Key=file_name,
+                Body=image_bytes,
+                ContentType=content_type,
+                **extra
+            )
+            span.record_response(response)
+
+        return image_store.url_for(file_name)
+
+    except Exception as e:
+        print(f"AWS 이미지 생성 중 오류 발생: {e}")
+        return None
+
+
+def _image_keys(stem):
+    """내용 해시 stem 에 대한 (본 이미지 키, 썸네일 키 또는 None)"""
+    extension = image_processing.output_extension()
+    thumbnail_key = f"{stem}_thumb.{extension}" if image_processing.thumbnails_enabled() else None
+    return f"{stem}.{extension}", thumbnail_key
+
+
+def _image_urls(file_url, thumbnail_key):
+    urls = {"imageUrl": file_url}
+    if thumbnail_key:
+        urls["thumbnailUrl"] = image_store.url_for(thumbnail_key)
+    return urls
+
+
+def generate_and_upload_image(part, equipmentName, description, tier=None, seed=None):
+    """이미지 생성 후 후처리(재인코딩/썸네일)해 S3 업로드. (이미지 생성 성공 여부, {"imageUrl", "thumbnailUrl"}) 반환.
+    이미지는 번역된 프롬프트와 생성 파라미터(seed, 단계, 후처리 설정 포함)의 해시로 저장하고, 이미 있으면 생성하지 않고 기존 URL 반환.
+    seed 가 None 이면 IMAGE_VARIANTS 개 중 하나"""
+    try:
+        seed = choose_image_variant() if seed is None else seed
+        body = build_image_request(part, equipmentName, description, seed=seed, tier=tier)
+    except Exception as e:
+        print(f"AWS 이미지 생성 중 오류 발생: {e}")
+        return False, None
+
+    stem = image_request_digest(body, extra=image_processing.encoding_signature())
+    file_name, thumbnail_key = _image_keys(stem)
+    file_url = image_store.lookup(file_name)
+    if file_url:
+        return True, _image_urls(file_url, thumbnail_key)
+
+    image_bytes = invoke_image_model(body)
+    if not image_bytes:
+        return False, None
+    try:
+        image, thumbnail = image_processing.process_image(image_bytes)
+    except Exception as e:
+        # 잘리거나 손상된 응답 이미지 (Pillow 디코딩 오류 등)
+        print(f"AWS 이미지 후처리 중 오류 발생: {e}")
+        return False, None
+    cache_control = image_processing.CACHE_CONTROL
+
+    # 썸네일을 먼저 올리고, 성공한 경우에만 본 이미지를 내용 해시 키로 저장 (재사용 시 썸네일이 항상 있도록)
+    if thumbnail is not None and upload_image(thumbnail.data, thumbnail_key, thumbnail.content_type, cache_control) is None:
+        file_url = upload_image(image.data, f"{uuid.uuid4()}.{image.extension}", image.content_type)
+        return True, {"imageUrl": file_url}
+    file_url = upload_image(image.data, file_name, image.content_type, cache_control)
+    if not file_url:
+        return True, {"imageUrl": None}
+    image_store.record(file_name, file_url)
+    return True, _image_urls(file_url, thumbnail_key if thumbnail is not None else None)
+
+
+def _image_flight_key(part, equipmentName, description, tier, seed=None):
+    """이미지 요청 병합 키 (공백만 정규화한 부위/이름/설명, 이미지 단계, 지정한 seed)"""
+    return (part, " ".join(str(equipmentName or "").split()), " ".join(str(description or "").split()), tier, seed)
+
+
+def submit_image_job(part, equipmentName, description, tier=None):
+    """이미지 생성/업로드 작업을 작업 스레드 풀에 제출하고 Future 반환 (진행 중인 같은 장비의 작업이 있으면 그 Future 공유)"""
+    task = tracing.bind(generate_and_upload_image)
+    if image_flight is None:
+        return _executor.submit(task, part, equipmentName, description, tier)
+    key = _image_flight_key(part, equipmentName, description, tier)
+    return image_flight.submit(key, _executor, task, part, equipmentName, description, tier)[0]
+
+
+def run_image_job(part, equipmentName, description, tier=None, seed=None):
+    """이미지 생성/업로드를 현재 스레드에서 실행 (진행 중인 같은 장비의 작업이 있으면 그 결과 공유)"""
+    if image_flight is None:
+        return generate_and_upload_image(part, equipmentName, description, tier, seed)
+    key = _image_flight_key(part, equipmentName, description, tier, seed)
+    return image_flight.do(key, generate_and_upload_image, part, equipmentName, description, tier, seed)[0]
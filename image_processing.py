@@ -0,0 +1,115 @@
+"""
+image_processing.py
+2026.10.17
+생성된 장비 이미지 후처리 (JPEG/WebP 재인코딩, 아이콘 썸네일)
+
+Pillow 가 설치되어 있지 않으면 재인코딩/썸네일 없이 Titan 이 돌려준 PNG 를 그대로 사용한다.
+"""
+import io
+import os
+from collections import namedtuple
+
+import tracing
+
+# 출력 형식: (Pillow 형식 이름, Content-Type, 확장자)
+OUTPUT_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "png": ("PNG", "image/png", "png"),
+}
+
+IMAGE_OUTPUT_FORMAT = os.environ.get("IMAGE_OUTPUT_FORMAT", "jpeg")
+IMAGE_OUTPUT_QUALITY = int(os.environ.get("IMAGE_OUTPUT_QUALITY", "85"))
+# 썸네일 한 변 크기(px), 0 이면 만들지 않음
+THUMBNAIL_SIZE = int(os.environ.get("IMAGE_THUMBNAIL_SIZE", "128"))
+# 이미지 키는 내용 해시이므로 같은 키의 내용은 바뀌지 않는다
+CACHE_CONTROL = os.environ.get("IMAGE_CACHE_CONTROL", "public, max-age=31536000, immutable")
+
+EncodedImage = namedtuple("EncodedImage", ["data", "content_type", "extension"])
+
+_pillow = None
+
+
+def _load_pillow():
+    """Pillow 지연 로드 (없으면 False)"""
+    global _pillow
+    if _pillow is None:
+        try:
+            from PIL import Image
+            _pillow = Image
+        except ImportError:
+            _pillow = False
+    return _pillow
+
+
+def pillow_available():
+    return bool(_load_pillow())
+
+
+def sniff_content_type(data):
+    """이미지 바이트의 실제 형식 판별 → (Content-Type, 확장자)"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png", "png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", "jpg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return "application/octet-stream", "bin"
+
+
+def output_format():
+    """실제로 사용할 출력 형식 (Pillow 가 없으면 png)"""
+    if not pillow_available():
+        return "png"
+    return IMAGE_OUTPUT_FORMAT if IMAGE_OUTPUT_FORMAT in OUTPUT_FORMATS else "jpeg"
+
+
+def output_extension():
+    return OUTPUT_FORMATS[output_format()][2]
+
+
+def thumbnails_enabled():
+    return THUMBNAIL_SIZE > 0 and pillow_available()
+
+
+def encoding_signature():
+    """후처리 설정 문자열 (설정이 바뀌면 이미지 키도 달라지도록 키 계산에 포함)"""
+    fmt = output_format()
+    if fmt == "png" and not pillow_available():
+        return ""
+    return f"{fmt}:{IMAGE_OUTPUT_QUALITY}:thumb{THUMBNAIL_SIZE if thumbnails_enabled() else 0}"
+
+
+def _encode(image, fmt, quality):
+    pil_format, content_type, extension = OUTPUT_FORMATS[fmt]
+    if fmt == "jpeg" and image.mode != "RGB":
+        # JPEG 는 투명도를 지원하지 않으므로 흰 배경에 합성
+        image = image.convert("RGBA")
+        background = _pillow.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        image = background
+    buffer = io.BytesIO()
+    options = {"optimize": True} if fmt in ("jpeg", "png") else {}
+    if fmt != "png":
+        options["quality"] = quality
+    image.save(buffer, format=pil_format, **options)
+    return EncodedImage(buffer.getvalue(), content_type, extension)
+
+
+def process_image(image_bytes):
+    """원본 이미지를 출력 형식으로 재인코딩하고 썸네일 생성. (본 이미지, 썸네일 또는 None) 반환"""
+    if not pillow_available():
+        content_type, extension = sniff_content_type(image_bytes)
+        return EncodedImage(image_bytes, content_type, extension), None
+
+    with tracing.span("image.process", bytes=len(image_bytes)):
+        fmt = output_format()
+        with _pillow.open(io.BytesIO(image_bytes)) as image:
+            image.load()
+            main = _encode(image, fmt, IMAGE_OUTPUT_QUALITY)
+            thumbnail = None
+            if thumbnails_enabled():
+                small = image.copy()
+                small.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), _pillow.LANCZOS)
+                thumbnail = _encode(small, fmt, IMAGE_OUTPUT_QUALITY)
+    return main, thumbnail
@@ -0,0 +1,67 @@
+"""
+image_store.py
+2026.10.17
+내용 해시로 저장된 장비 이미지 색인 (프로세스 내 색인 + S3 HEAD 확인)
+"""
+import os
+
+import tracing
+from aws_clients import get_client
+from stat_cache import LRUCache
+
+# HEAD 요청에서 객체가 없음을 뜻하는 오류 코드
+_MISSING_CODES = ("404", "NoSuchKey", "NotFound")
+
+
+class ImageStore:
+    """이미지 키(내용 해시) → URL 조회.
+    warm 컨테이너에서 이미 확인한 키는 메모리 색인에서 바로 찾고, 처음 보는 키는 S3 HEAD 요청으로 존재 여부를 확인한다."""
+
+    def __init__(self, bucket, index_size=4096):
+        self.bucket = bucket
+        self.index = LRUCache(max_size=index_size, ttl=None)
+        self.index_hits = 0
+        self.head_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, bucket):
+        return cls(bucket, index_size=int(os.environ.get("IMAGE_INDEX_SIZE", "4096")))
+
+    def url_for(self, key):
+        return f"https://{self.bucket}.s3.amazonaws.com/{key}"
+
+    def lookup(self, key):
+        """저장된 이미지가 있으면 URL, 없으면 None"""
+        url = self.index.get(key)
+        if url is not None:
+            self.index_hits += 1
+            tracing.incr("ImageIndexHits")
+            return url
+        try:
+            with tracing.span("s3.head_object") as span:
+                response = get_client("s3").head_object(Bucket=self.bucket, Key=key)
+                span.record_response(response)
+        except Exception as e:
+            code = str(getattr(e, "response", {}).get("Error", {}).get("Code", ""))
+            if code not in _MISSING_CODES:
+                print(f"S3 이미지 조회 중 오류 발생: {e}")
+            self.misses += 1
+            return None
+        self.head_hits += 1
+        tracing.incr("ImageStoreHits")
+        url = self.url_for(key)
+        self.index.set(key, url)
+        return url
+
+    def record(self, key, url):
+        """업로드한 이미지를 색인에 추가"""
+        self.index.set(key, url)
+
+    def stats(self):
+        return {
+            "indexHits": self.index_hits,
+            "headHits": self.head_hits,
+            "misses": self.misses,
+            "indexEntries": len(self.index),
+        }
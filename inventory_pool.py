@@ -0,0 +1,285 @@
+"""
+inventory_pool.py
+2026.10.17
+미리 생성해 둔 장비 재고 (랜덤 드롭/"아무거나" 요청에 즉시 응답)
+
+부위(weapon/top/hat/shoes)마다 스탯과 S3 이미지까지 만들어 둔 장비를 목표 개수만큼 큐에 쌓아 두고, pop 은 O(1)로 하나를 꺼낸다.
+채우기는 요청 경로와 같은 생성 함수(backend.generate_stat_with_meta, image_pipeline.run_image_job)를 쓰되,
+템플릿 조합이 많지 않으므로 결과 캐시를 거치지 않고 이미지 seed 도 장비마다 새로 골라 같은 템플릿도 다른 장비가 되게 한다.
+- 장시간 실행되는 서버: start() 로 백그라운드 스레드를 띄우면 INVENTORY_REFILL_HOURS(UTC) 시간대에만 주기적으로 채운다.
+- Lambda: 요청 사이에 스레드가 멈추므로 한가한 시간대에 EventBridge 예약 규칙으로 {"inventoryRefill": true} 이벤트를 보내 채운다.
+  재고는 컨테이너 메모리에 있으므로, 채운 컨테이너가 처리하는 요청만 재고를 쓰고 나머지는 바로 생성한다.
+절차 생성으로 대체된 결과, 유사도 색인에서 빌려 온 결과, 이미지가 없는 결과는 재고에 넣지 않는다.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import backend
+import catalog
+import tracing
+
+# 재고용 장비 이름/설명 재료: 부위별 기본 장비 × 공통 수식어 (이름 "맹독 단검", 설명 "손에 쏙 들어오는 작은 단검. 칼날에 맹독이 스며 있다.")
+INVENTORY_BASES = {
+    "weapon": [
+        ("단검", "손에 쏙 들어오는 작은 단검"),
+        ("장검", "기사가 쓰던 곧게 뻗은 장검"),
+        ("도끼", "나무꾼이 쓰던 묵직한 도끼"),
+        ("창", "끝이 번뜩이는 긴 창"),
+        ("활", "가볍게 당겨지는 나무 활"),
+    ],
+    "top": [
+        ("갑옷", "몸 전체를 감싸는 판금 갑옷"),
+        ("로브", "마법사가 즐겨 입는 긴 로브"),
+        ("가죽 조끼", "움직이기 편한 가죽 조끼"),
+        ("사슬 갑옷", "촘촘한 고리로 엮은 사슬 갑옷"),
+    ],
+    "hat": [
+        ("투구", "머리를 단단히 지켜 주는 투구"),
+        ("두건", "얼굴을 가려 주는 천 두건"),
+        ("왕관", "보석이 박힌 작은 왕관"),
+        ("마법사 모자", "끝이 뾰족한 마법사 모자"),
+    ],
+    "shoes": [
+        ("장화", "진흙길도 거뜬한 가죽 장화"),
+        ("샌들", "발이 가벼운 여행자의 샌들"),
+        ("철갑 부츠", "철판을 덧댄 묵직한 부츠"),
+        ("천 신발", "소리 없이 걸을 수 있는 천 신발"),
+    ],
+}
+INVENTORY_MODIFIERS = [
+    ("맹독", "맹독이 스며 있어 스치기만 해도 아프다."),
+    ("화염", "불꽃이 타오르는 기운이 깃들어 있다."),
+    ("서리", "닿는 곳마다 서리가 내려앉는다."),
+    ("번개", "번개의 힘이 깃들어 찌릿하다."),
+    ("바람", "바람처럼 가볍고 빠르다."),
+    ("강철", "두꺼운 강철로 단단하게 만들어졌다."),
+    ("축복받은", "성스러운 축복이 깃들어 있다."),
+    ("그림자", "그림자처럼 모습을 감춰 준다."),
+]
+
+
+def parse_depths(value, parts, default):
+    """"weapon=20,hat=5" 형식의 부위별 목표 개수 (없는 부위는 default)"""
+    depths = dict.fromkeys(parts, default)
+    for entry in (value or "").split(","):
+        part, _, depth = entry.partition("=")
+        if part.strip() in depths and depth.strip():
+            depths[part.strip()] = int(depth)
+    return depths
+
+
+def parse_hours(value):
+    """"17-21" 형식의 UTC 시간대 (끝 시각 미포함, "22-4" 처럼 자정을 넘을 수 있음). 비어 있으면 None (항상)"""
+    if not value:
+        return None
+    start, _, end = value.partition("-")
+    return int(start) % 24, int(end) % 24
+
+
+def random_template(part=None, rng=None):
+    """(부위, 이름, 설명) 하나를 무작위로 만든다 (part 가 None 이면 부위도 무작위)"""
+    if rng is None:
+        # 요청 경로에서는 재고가 빌 때만 쓰므로 처음 필요할 때 불러옴
+        import random
+        rng = random
+    part = part or rng.choice(list(INVENTORY_BASES))
+    base, base_desc = rng.choice(INVENTORY_BASES[part])
+    modifier, modifier_desc = rng.choice(INVENTORY_MODIFIERS)
+    return part, f"{modifier} {base}", f"{base_desc}. {modifier_desc}"
+
+
+def generate_pool_item(part, name, description, image_tier=None, seed=None):
+    """장비 하나를 스탯/이미지까지 생성해 재고 항목 dict 로 반환. 절차 생성 대체/유사 결과이거나 이미지가 없으면 None.
+    같은 템플릿이 다시 뽑혀도 다른 장비가 되도록 결과 캐시를 거치지 않고, 이미지 seed 도 매번 새로 고른다"""
+    # 캐릭터 요청만 처리하는 컨테이너는 이미지 경로를 불러오지 않도록 여기서 불러옴
+    import image_pipeline
+    data, meta = backend.generate_stat_with_meta(part, name, description, use_cache=False)
+    if meta["fallback"] or meta["similar"]:
+        return None
+    if seed is None:
+        import random
+        seed = random.randint(0, backend.IMAGE_SEED_MAX)
+    image_ok, image_urls = image_pipeline.run_image_job(part, name, description, image_tier, seed)
+    if not image_ok or not image_urls.get("imageUrl"):
+        return None
+    catalog.record_result(
+        part, name, description, data,
+        image_url=image_urls.get("imageUrl"), thumbnail_url=image_urls.get("thumbnailUrl"), model_id=backend.MODEL_ID,
+    )
+    return dict(data, part=part, equipmentName=name, description=description, **image_urls)
+
+
+class InventoryPool:
+    """부위별 장비 재고 (스레드 안전). depths: {부위: 목표 개수}"""
+
+    def __init__(self, depths, refill_hours=None, interval=60.0, workers=2, image_tier=None, generate=None):
+        self.depths = dict(depths)
+        self.refill_hours = refill_hours
+        self.interval = interval
+        self.workers = workers
+        self.image_tier = image_tier
+        self._generate = generate or generate_pool_item
+        self._items = {part: deque() for part in self.depths}
+        # 생성 중인 개수 (백그라운드 스레드와 예약 이벤트가 동시에 채워도 목표를 넘지 않도록)
+        self._pending = dict.fromkeys(self.depths, 0)
+        # 재고에 있는 (부위, 이름, 설명) (같은 장비가 여러 개 쌓이지 않도록)
+        self._pooled = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self._rng = None
+        self.popped = 0
+        self.misses = 0
+        self.generated = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls):
+        parts = backend.EQUIPMENT_KINDS
+        return cls(
+            parse_depths(os.environ.get("INVENTORY_DEPTHS"), parts, int(os.environ.get("INVENTORY_DEPTH", "20"))),
+            refill_hours=parse_hours(os.environ.get("INVENTORY_REFILL_HOURS")),
+            interval=float(os.environ.get("INVENTORY_REFILL_INTERVAL", "60")),
+            workers=int(os.environ.get("INVENTORY_REFILL_WORKERS", "2")),
+            image_tier=os.environ.get("INVENTORY_IMAGE_TIER") or None,
+        )
+
+    def _random(self):
+        # 요청 경로에서 쓰지 않는 모듈이므로 처음 필요할 때 불러옴
+        if self._rng is None:
+            import random
+            self._rng = random.Random()
+        return self._rng
+
+    def pop(self, part=None):
+        """재고에서 장비 하나를 꺼내 반환 (part 가 None 이면 재고가 있는 부위 중 무작위). 비어 있으면 None"""
+        with self._lock:
+            if part is None:
+                parts = [name for name, items in self._items.items() if items]
+                part = self._random().choice(parts) if parts else None
+            items = self._items.get(part)
+            if not items:
+                self.misses += 1
+                return None
+            item = items.popleft()
+            self._pooled.discard((part, item["equipmentName"], item["description"]))
+            self.popped += 1
+        tracing.incr("InventoryHits")
+        return item
+
+    def depth(self, part):
+        return len(self._items.get(part, ()))
+
+    def in_refill_window(self, now=None):
+        """지금이 채우는 시간대(UTC)인지 여부"""
+        if self.refill_hours is None:
+            return True
+        start, end = self.refill_hours
+        hour = time.gmtime(now).tm_hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def _reserve(self, limit):
+        """목표보다 모자란 부위를 골라 생성할 (부위, 이름, 설명) 을 최대 limit 개 예약"""
+        tasks = []
+        with self._lock:
+            for part, target in self.depths.items():
+                need = target - len(self._items[part]) - self._pending[part]
+                for _ in range(max(0, min(need, limit - len(tasks)))):
+                    task = random_template(part, self._random())
+                    if task in self._pooled:
+                        continue
+                    self._pooled.add(task)
+                    self._pending[part] += 1
+                    tasks.append(task)
+        return tasks
+
+    def _generate_one(self, task):
+        part, name, description = task
+        try:
+            item = self._generate(part, name, description, self.image_tier)
+        except Exception as e:
+            print(f"재고 장비 생성 중 오류 발생: {e}")
+            item = None
+        with self._lock:
+            self._pending[part] -= 1
+            if item is None:
+                self._pooled.discard(task)
+                self.failed += 1
+            else:
+                self._items[part].append(item)
+                self.generated += 1
+        return item is not None
+
+    def refill(self, deadline=None):
+        """모든 부위를 목표 개수까지 채우고 추가한 개수 반환.
+        deadline(time.monotonic 기준)이 지나면 새 생성을 시작하지 않고, 한 차례 생성이 모두 실패하면(Bedrock 장애 등) 멈춘다"""
+        added = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inventory") as executor:
+            while not self._stop.is_set() and (deadline is None or time.monotonic() < deadline):
+                tasks = self._reserve(self.workers)
+                if not tasks:
+                    break
+                results = list(executor.map(tracing.bind(self._generate_one), tasks))
+                added += sum(results)
+                if not any(results):
+                    break
+        return added
+
+    def start(self):
+        """백그라운드 채우기 스레드 시작 (interval 초마다 채우는 시간대인지 확인)"""
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="inventory-refill", daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.in_refill_window():
+                self.refill()
+            self._stop.wait(self.interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "depths": {part: len(items) for part, items in self._items.items()},
+                "targets": dict(self.depths),
+                "pending": dict(self._pending),
+                "popped": self.popped,
+                "misses": self.misses,
+                "generated": self.generated,
+                "failed": self.failed,
+            }
+
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory():
+    """프로세스 공유 재고 반환 (처음 호출 시 환경 변수로 생성, INVENTORY_WORKER=1 이면 백그라운드 채우기 시작)"""
+    global _inventory
+    if _inventory is None:
+        with _inventory_lock:
+            if _inventory is None:
+                _inventory = InventoryPool.from_env()
+                if os.environ.get("INVENTORY_WORKER", "0") == "1":
+                    _inventory.start()
+    return _inventory
+
+
+def set_inventory(inventory):
+    """공유 재고 교체 (로컬 대역/벤치마크용)"""
+    global _inventory
+    with _inventory_lock:
+        _inventory = inventory
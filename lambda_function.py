@@ -1,13 +1,195 @@
 import json
-import boto3
-import base64
-import uuid
-from backend import generate_character_stat, generate_weapon_stat, generate_shoes_stat, generate_hat_stat, generate_top_stat, generate_image_from_prompt
+import os
+import time
+import aws_clients
+import tracing
+from backend import (
+    EQUIPMENT_KINDS,
+    MODEL_ID,
+    generate_batch,
+    generate_item,
+    generate_stat_with_meta,
+    get_image_tier,
+    get_pool,
+)
 
-s3_client = boto3.client('s3')
-BUCKET_NAME = 'inha-pj-03-s3-img'
+# 이미지 생성(번역 → Titan → S3 업로드)과 스탯 생성을 동시에 실행할지 여부
+CONCURRENT_EQUIPMENT = os.environ.get("CONCURRENT_EQUIPMENT", "1") != "0"
 
+# image_pipeline 으로 옮긴 이미지 관련 속성 (예전 lambda_function.<이름> 호환)
+_IMAGE_PIPELINE_ATTRS = (
+    "BUCKET_NAME",
+    "image_store",
+    "image_flight",
+    "upload_image",
+    "generate_and_upload_image",
+    "submit_image_job",
+    "run_image_job",
+)
+
+
+def _image_pipeline():
+    """이미지 경로 모듈 지연 로드 (캐릭터 요청만 처리하는 컨테이너는 불러오지 않음)"""
+    import image_pipeline
+    return image_pipeline
+
+
+def _catalog():
+    """생성 기록 모듈 지연 로드 (장비 생성/조회 경로에서만 사용)"""
+    import catalog
+    return catalog
+
+
+def _inventory_pool():
+    """장비 재고 모듈 지연 로드 (랜덤 장비/재고 채우기 경로에서만 사용)"""
+    import inventory_pool
+    return inventory_pool
+
+
+def __getattr__(name):
+    if name in _IMAGE_PIPELINE_ATTRS:
+        return getattr(_image_pipeline(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class ImageGenerationError(Exception):
+    """장비 이미지 생성 실패"""
+
+
+def create_equipment(part, equipmentName, description, image_tier=None):
+    """장비 이미지/스탯 생성. (imageUrl, thumbnailUrl 이 포함된 장비 정보, 메타데이터) 반환, 이미지 생성 실패 시 ImageGenerationError"""
+    # 이미지 생성/S3 업로드와 스탯 생성은 서로 독립적이므로 동시에 실행
+    if CONCURRENT_EQUIPMENT:
+        image_future = _image_pipeline().submit_image_job(part, equipmentName, description, image_tier)
+        data, meta = generate_stat_with_meta(part, equipmentName, description)
+        image_ok, image_urls = image_future.result()
+    else:
+        image_ok, image_urls = _image_pipeline().run_image_job(part, equipmentName, description, image_tier)
+        data, meta = generate_stat_with_meta(part, equipmentName, description) if image_ok else (None, None)
+
+    if not image_ok:
+        raise ImageGenerationError("이미지 생성에 실패했습니다. 프롬프트/입력값/모델 상태를 확인하세요.")
+    # 스탯은 생성 시 이미 기록되었으므로 이미지 URL 만 채워짐 (캐시된 스탯이어도 기록이 없으면 새로 남김)
+    # 절차 생성으로 대체된 스탯과 유사도 색인에서 빌려 온 다른 입력의 스탯은 기록하지 않음
+    if not meta.get("fallback") and not meta.get("similar"):
+        _catalog().record_result(
+            part, equipmentName, description, data,
+            image_url=image_urls.get("imageUrl"), thumbnail_url=image_urls.get("thumbnailUrl"), model_id=MODEL_ID,
+        )
+    data.update(image_urls)
+    return data, meta
+
+
+# 생성 기록 조회 최대 건수
+CATALOG_MAX_RESULTS = int(os.environ.get("CATALOG_MAX_RESULTS", "100"))
+
+
+def find_items(params):
+    """생성 기록 조회. params: {"kind", "name", "description"} 또는 {"kind", "stat", "min", "max", "limit"}"""
+    store = _catalog().get_catalog()
+    if store is None:
+        return []
+    kind = params.get("kind")
+    if params.get("description"):
+        record = store.lookup(kind, params.get("name"), params["description"])
+        return [record] if record else []
+    ranges = {}
+    if params.get("stat"):
+        low, high = params.get("min"), params.get("max")
+        ranges[params["stat"]] = (
+            float(low) if low not in (None, "") else None,
+            float(high) if high not in (None, "") else None,
+        )
+    limit = min(int(params.get("limit") or CATALOG_MAX_RESULTS), CATALOG_MAX_RESULTS)
+    return store.find(kind, ranges, limit)
+
+
+# 배치 요청 최대 항목 수
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "50"))
+
+
+def create_batch_item(item):
+    """배치 항목 하나 생성 (장비는 이미지 생성/업로드 포함)"""
+    kind = item.get("kind")
+    if kind not in EQUIPMENT_KINDS:
+        return generate_item(item)
+    if not item.get("description"):
+        raise ValueError("description은 필수입니다.")
+    image_tier = item.get("imageTier")
+    get_image_tier(image_tier)
+    return create_equipment(kind, item.get("name"), item.get("description"), image_tier)[0]
+
+
+def pop_equipment(part=None, image_tier=None):
+    """재고에서 장비 하나를 꺼내 (장비 정보, 메타데이터) 반환. 재고가 없으면 무작위 장비를 바로 생성 (ImageGenerationError 가능)
+    재고는 INVENTORY_IMAGE_TIER 단계 이미지로 만들어 두므로, 다른 단계를 요청하면 재고를 쓰지 않는다"""
+    inventory = _inventory_pool().get_inventory()
+    item = inventory.pop(part) if image_tier in (None, inventory.image_tier) else None
+    if item is not None:
+        return item, {"pooled": True, "remaining": inventory.depth(item["part"])}
+    # 재고가 없으면 재고와 같은 방식으로 이름/설명을 골라 바로 생성
+    part, name, description = _inventory_pool().random_template(part)
+    data, meta = create_equipment(part, name, description, image_tier)
+    data.update(part=part, equipmentName=name, description=description)
+    return data, dict(meta, pooled=False, remaining=0)
+
+
+# 재고 채우기 중 Lambda 제한 시간까지 남겨 둘 여유 (초, 진행 중인 생성이 끝날 시간)
+INVENTORY_REFILL_MARGIN = float(os.environ.get("INVENTORY_REFILL_MARGIN", "30"))
+
+
+def refill_inventory(context=None):
+    """재고 채우기 (EventBridge 예약 규칙의 {"inventoryRefill": true} 이벤트). Lambda 제한 시간 전에 새 생성을 멈춘다"""
+    deadline = None
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - INVENTORY_REFILL_MARGIN
+    inventory = _inventory_pool().get_inventory()
+    start = time.perf_counter()
+    added = inventory.refill(deadline)
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "isSuccess": True,
+            "added": added,
+            "inventory": inventory.stats(),
+            "elapsedMs": round((time.perf_counter() - start) * 1000, 1),
+        })
+    }
+
+
+def is_warmup_event(event):
+    """warm-up 이벤트 여부 ({"warmup": true} 또는 EventBridge 예약 규칙)"""
+    return bool(event.get("warmup")) or event.get("source") == "aws.events"
+
+
+def warm_up():
+    """클라이언트 생성, 이미지 경로 모듈/Pillow 로드, AWS 연결 열기를 미리 수행"""
+    start = time.perf_counter()
+    pipeline = _image_pipeline()
+    import image_processing
+    image_processing.pillow_available()
+    clients = aws_clients.warm_up(bucket=pipeline.BUCKET_NAME, model_id=MODEL_ID)
+    # BEDROCK_REGIONS 의 다른 리전 클라이언트도 미리 생성
+    regions = {name: get_pool(name).warm_up() for name in ("text", "image")}
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "isSuccess": True,
+            "warmed": clients,
+            "regions": regions,
+            "elapsedMs": round((time.perf_counter() - start) * 1000, 1),
+        })
+    }
+
+
+@tracing.traced_handler
 def lambda_handler(event, context):
+    # 재고 채우기 예약 이벤트 (warm-up 보다 먼저 확인: 둘 다 EventBridge 예약 규칙으로 보냄)
+    if event.get("inventoryRefill"):
+        return refill_inventory(context)
+    if is_warmup_event(event):
+        return warm_up()
+
     path = event.get("path", "")
     http_method = event.get("httpMethod", "")
     body = event.get("body")
@@ -18,18 +200,11 @@ def lambda_handler(event, context):
     if path == "/api/characters" and http_method == "POST":
         name = body.get("characterName")
         desc = body.get("description")
-        result = generate_character_stat(name, desc)
-        try:
-            data = json.loads(result)
-            return {
-                "statusCode": 200,
-                "body": json.dumps({"isSuccess": True, "result": data})
-            }
-        except json.JSONDecodeError:
-            return {
-                "statusCode": 200,
-                "body": json.dumps({"isSuccess": True, "raw_result": result})
-            }
+        data, meta = generate_stat_with_meta("character", name, desc)
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"isSuccess": True, "result": data, "meta": meta})
+        }
     # 장비 생성 API
     elif path == "/api/equipments" and http_method == "POST":
         # 1. 요청 본문에서 'part', 'description', 'equipmentType'을 추출
@@ -37,6 +212,7 @@ def lambda_handler(event, context):
             part = body.get("equipmentType")
             equipmentName = body.get("equipmentName")
             description = body.get("description")
+            image_tier = body.get("imageTier")
 
             if not part or not description:
                 return {
@@ -44,67 +220,40 @@ def lambda_handler(event, context):
                     "body": json.dumps({"isSuccess": False, "message": "part와 description은 필수입니다."})
                 }
             
-            # 2. 'part'에 따라 적절한 장비 생성 함수 호출
-            result = None
-
-            # 이미지 생성 및 S3 업로드 
-            image_bytes = generate_image_from_prompt(part, equipmentName, description)
-            if not image_bytes:
-                # 이미지 생성 실패 시
-                return {
-                    "statusCode": 503,
-                    "body": json.dumps({
-                        "isSuccess": False,
-                        "message": "이미지 생성에 실패했습니다. 프롬프트/입력값/모델 상태를 확인하세요."
-                    })
-                }
-            
-            file_url = None
-            try:
-                file_name = str(uuid.uuid4()) + ".jpg"
-
-                s3_client.put_object(
-                    Bucket=BUCKET_NAME,
-                    Key=file_name,
-                    Body=image_bytes,      
-                    ContentType='image/jpeg'
-                )
-
-                file_url = f"https://{BUCKET_NAME}.s3.amazonaws.com/{file_name}"
-                
-            except Exception as e:
-                print(f"AWS 이미지 생성 중 오류 발생: {e}")
- 
-
-            if part == "weapon":
-                result = generate_weapon_stat(equipmentName, description)
-            elif part == "top":
-                result = generate_top_stat(equipmentName, description)
-            elif part == "hat":
-                result = generate_hat_stat(equipmentName, description)
-            elif part == "shoes":
-                result = generate_shoes_stat(equipmentName, description)
-            else:
+            # 2. 'part'가 유효한 장비 부위인지 확인
+            if part not in EQUIPMENT_KINDS:
                 return {
                     "statusCode": 400,
                     "body": json.dumps({"isSuccess": False, "message": f"'{part}'는 유효한 장비 부위가 아닙니다."})
                 }
 
-            # 3. 생성된 결과를 성공 응답으로 포장하여 반환
+            # 3. 이미지 해상도/품질 단계 확인 (생략 시 기본 단계)
             try:
-                data = json.loads(result)
-                data["imageUrl"] = file_url
+                get_image_tier(image_tier)
+            except ValueError as e:
                 return {
-                    "statusCode": 200,
-                    "body": json.dumps({"isSuccess": True, "result": data})
+                    "statusCode": 400,
+                    "body": json.dumps({"isSuccess": False, "message": str(e)})
                 }
-            except json.JSONDecodeError:
-                # Bedrock이 JSON이 아닌 일반 텍스트를 반환한 경우를 대비
+
+            try:
+                data, meta = create_equipment(part, equipmentName, description, image_tier)
+            except ImageGenerationError as e:
+                # 이미지 생성 실패 시
                 return {
-                    "statusCode": 200,
-                    "body": json.dumps({"isSuccess": True, "raw_result": result})
+                    "statusCode": 503,
+                    "body": json.dumps({
+                        "isSuccess": False,
+                        "message": str(e)
+                    })
                 }
 
+            # 4. 생성된 결과를 성공 응답으로 포장하여 반환
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"isSuccess": True, "result": data, "meta": meta})
+            }
+
         except Exception as e:
             print(f"[ERROR] An unhandled exception occurred in the Lambda function: {e}")
             
@@ -115,5 +264,77 @@ def lambda_handler(event, context):
                     "message": "서버 내부에서 장비 생성 중 오류가 발생했습니다.",
                 })
             }
+    # 재고 장비 API (랜덤 드롭): 미리 생성해 둔 장비를 바로 반환, 재고가 없으면 무작위 장비를 생성
+    # 예: GET /api/equipments/random?part=weapon (part 생략 시 아무 부위)
+    elif path == "/api/equipments/random" and http_method == "GET":
+        params = event.get("queryStringParameters") or {}
+        part = params.get("part")
+        image_tier = params.get("imageTier")
+        if part is not None and part not in EQUIPMENT_KINDS:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"isSuccess": False, "message": f"'{part}'는 유효한 장비 부위가 아닙니다."})
+            }
+        try:
+            get_image_tier(image_tier)
+        except ValueError as e:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"isSuccess": False, "message": str(e)})
+            }
+        try:
+            data, meta = pop_equipment(part, image_tier)
+        except ImageGenerationError as e:
+            return {
+                "statusCode": 503,
+                "body": json.dumps({"isSuccess": False, "message": str(e)})
+            }
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"isSuccess": True, "result": data, "meta": meta})
+        }
+    # 생성 기록 조회 API
+    # 예: GET /api/items?kind=weapon&stat=attackBonus&min=6, GET /api/items?kind=weapon&name=맹독 단검&description=...
+    elif path == "/api/items" and http_method == "GET":
+        params = event.get("queryStringParameters") or {}
+        if params.get("kind") is not None and params["kind"] != "character" and params["kind"] not in EQUIPMENT_KINDS:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"isSuccess": False, "message": f"'{params['kind']}'는 유효한 생성 종류가 아닙니다."})
+            }
+        try:
+            items = find_items(params)
+        except ValueError:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"isSuccess": False, "message": "min, max, limit은 숫자여야 합니다."})
+            }
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"isSuccess": True, "results": items})
+        }
+    # 배치 생성 API
+    # 요청 본문: {"items": [{"kind": "character" | "weapon" | "top" | "hat" | "shoes", "name": ..., "description": ...}, ...]}
+    elif path == "/api/batch" and http_method == "POST":
+        items = (body or {}).get("items")
+        if not isinstance(items, list) or not items:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"isSuccess": False, "message": "items는 비어 있지 않은 배열이어야 합니다."})
+            }
+        if len(items) > BATCH_MAX_ITEMS:
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"isSuccess": False, "message": f"items는 최대 {BATCH_MAX_ITEMS}개까지 요청할 수 있습니다."})
+            }
+        if not all(isinstance(item, dict) for item in items):
+            return {
+                "statusCode": 400,
+                "body": json.dumps({"isSuccess": False, "message": "items의 각 항목은 객체여야 합니다."})
+            }
 
-
+        results = generate_batch(items, handler=create_batch_item)
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"isSuccess": True, "results": results})
+        }
@@ -0,0 +1,173 @@
+"""
+procedural.py
+2026.10.17
+설명 키워드 기반 절차적 스탯 생성기 (Bedrock 장애/과부하 시 대체 결과)
+
+이름/설명에서 키워드(예: 빠른/fast → speed, 단단한 → defense, 독/poison → poison 효과)를 찾아 스탯 쏠림을 정하고,
+이름/설명의 해시로 만든 작은 흔들림을 더해 같은 입력에는 항상 같은 결과, 다른 입력에는 서로 다른 결과를 만든다.
+여기서는 범위 안의 원시 값과 reason 만 만들고, 범위/타입/정규화 합(0.8~1.2) 보정은 backend 의
+validate_stats / validate_equipment 가 모델 출력과 똑같이 처리한다. 외부 호출 없이 1ms 안에 끝난다.
+"""
+import hashlib
+
+# 스탯 쏠림 규칙: (키워드, {스탯: 위치 변화(범위 내 0~1 위치 기준)}, reason 을 붙일 스탯, reason 후보)
+# 키워드는 소문자로 비교하며 부분 문자열로 찾는다 (한국어 어간 "빠르" 는 빠른/빠르게/빠르다 모두 해당)
+STAT_RULES = (
+    (("빠른", "빠르", "재빠", "날쌘", "날렵", "민첩", "신속", "질주", "fast", "quick", "swift", "agile"),
+     {"speed": 0.35, "dodgeChance": 0.15}, "speed",
+     ("바람을 가르는 듯한 속도가 느껴져!", "눈 깜짝할 새에 저만치 가 있을 것 같아", "발걸음이 가볍다 못해 날아갈 듯!")),
+    (("단단", "튼튼", "강철", "철벽", "방패", "갑옷", "바위", "tough", "sturdy", "armor", "shield", "iron"),
+     {"defense": 0.35, "hp": 0.15, "speed": -0.1}, "defense",
+     ("바위처럼 단단한 인상!", "웬만한 공격은 그냥 튕겨낼 것 같아", "두드려 봐도 꿈쩍도 안 할 듯한 든든함")),
+    (("거대", "거인", "덩치", "체력", "골렘", "giant", "huge", "tank"),
+     {"hp": 0.4, "speed": -0.15}, "hp",
+     ("쓰러뜨리려면 하루 종일 걸리겠는데?", "넘치는 생명력이 그대로 전해져!", "산처럼 버티고 서 있을 것 같은 존재감")),
+    (("강한", "강력", "괴력", "힘센", "파괴", "전사", "strong", "mighty", "warrior", "berserk"),
+     {"attack": 0.35, "criticalDamage": 0.15}, "attack",
+     ("한 방 한 방이 묵직하게 울릴 것 같아!", "휘두를 때마다 땅이 흔들릴 듯한 위압감", "저 힘 앞에선 누구라도 움찔하겠어")),
+    (("날카로", "치명", "암살", "급소", "예리", "sharp", "assassin", "critical", "deadly"),
+     {"criticalChance": 0.35, "criticalDamage": 0.2}, "criticalChance",
+     ("작은 빈틈도 놓치지 않을 예리함!", "스치기만 해도 아찔할 것 같아", "급소만 골라 노리는 섬뜩한 감각")),
+    (("정확", "명사수", "저격", "궁수", "집중", "지혜", "sniper", "archer", "accurate", "precise", "focus"),
+     {"accuracy": 0.35, "criticalChance": 0.1}, "accuracy",
+     ("노린 곳은 절대 빗나가지 않을 것 같아", "모든 게 선명하게 보이는 느낌!", "숨 한 번 고르면 백발백중일 듯")),
+    (("회피", "유령", "환영", "그림자", "닌자", "은신", "ghost", "shadow", "ninja", "evasive"),
+     {"dodgeChance": 0.35, "speed": 0.1}, "dodgeChance",
+     ("잡으려 하면 연기처럼 사라질 것 같아", "공격이 스쳐 지나가기만 할 듯한 몸놀림", "어디 있는지 눈으로 좇기도 힘들겠는데?")),
+    (("느린", "느릿", "둔한", "무거운", "slow", "heavy"),
+     {"speed": -0.3, "dodgeChance": -0.15}, None, ()),
+    (("약한", "연약", "허약", "작은", "weak", "frail", "tiny"),
+     {"hp": -0.3, "defense": -0.15}, None, ()),
+)
+
+# 키워드가 없는 스탯에 붙이는 reason (캐릭터 reason 은 최소 3개, 장비는 bonusType 스탯의 것 1개)
+DEFAULT_REASONS = {
+    "hp": "쉽게 쓰러질 것 같지는 않아.",
+    "attack": "만만하게 볼 상대는 아닌 듯!",
+    "defense": "생각보다 꽤 버텨낼 것 같은 인상이야.",
+    "criticalChance": "가끔 번뜩이는 한 방이 나올 것 같아.",
+    "criticalDamage": "제대로 맞으면 꽤 아플 듯!",
+    "speed": "움직임에 군더더기가 없어 보여.",
+    "dodgeChance": "의외로 요리조리 잘 피할 것 같은데?",
+    "accuracy": "노리는 눈빛이 제법 날카로워.",
+}
+MIN_REASONS = 3
+
+# 효과 규칙: (키워드, 효과 type, typeReason 후보)
+EFFECT_RULES = (
+    (("맹독", "독이", "독을", "독침", "독액", "독성", "독 효과", "독 공격", "중독", "poison", "venom", "toxic"), "poison",
+     ("독이라니, 상대방 고생 좀 하겠는데?", "스치기만 해도 몸이 저려올 것 같아")),
+    (("불꽃", "화염", "불타", "용암", "fire", "flame", "burn"), "burn",
+     ("닿는 순간 화르륵 타오를 것 같아!", "손에 쥐는 순간 열기가 전해지는 기분!")),
+    (("얼음", "냉기", "서리", "빙결", "ice", "frost", "freeze"), "freeze",
+     ("스치는 곳마다 서리가 내려앉을 듯", "차가운 기운에 상대가 그대로 굳어버리겠어")),
+    (("번개", "전기", "뇌전", "천둥", "thunder", "lightning", "shock"), "shock",
+     ("찌릿한 전류가 온몸을 타고 흐를 것 같아!", "번쩍하는 순간 상대는 이미 굳어 있겠지")),
+    (("흡혈", "뱀파이어", "피를", "vampire", "blood"), "lifeSteal",
+     ("상대의 기운을 빨아들이는 섬뜩함", "싸울수록 오히려 힘이 차오를 것 같아")),
+    (("치유", "회복", "성스러", "축복", "heal", "holy", "bless"), "heal",
+     ("따스한 빛이 상처를 감싸줄 것 같아", "입고만 있어도 기운이 돌아오는 느낌!")),
+    (("바람", "폭풍", "wind", "storm"), "windRun",
+     ("신으면 진짜로 바람을 타는 기분일 것 같아!", "바람이 등을 떠밀어 주는 느낌!")),
+    (("철벽", "강철", "요새", "iron", "fortress"), "ironWall",
+     ("두꺼운 강철이 있어 무슨 공격도 끄떡없을 것 같다!", "벽 뒤에 숨은 듯한 안도감")),
+    (("집중", "지혜", "명상", "focus", "wisdom"), "focus",
+     ("머리가 맑아지니 모든 게 선명하게 보여!", "잡념이 싹 사라지는 기분이야")),
+)
+
+# 캐릭터 스탯의 기준 위치 (범위 내 0~1). 정규화 합 0.8~1.2 는 스탯이 대체로 범위 상단에 있어야 맞춰지므로
+# (모든 스탯이 0.8 위치면 약 0.84) 기준을 높게 두고 키워드 쏠림과 흔들림으로 차이를 만든다
+BASE_POSITION = 0.8
+# 입력 해시로 더하는 흔들림 크기 (범위 내 위치 기준 ±JITTER)
+JITTER = 0.12
+# 쏠림 규칙이 하나 맞을 때마다 장비 bonusValue 위치에 더하는 값
+BONUS_STEP = 0.15
+
+
+def _digest(kind, name, desc):
+    text = f"{kind}\0{' '.join(str(name or '').split())}\0{' '.join(str(desc or '').split())}"
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def _jitter(digest, index):
+    """해시의 index 번째 바이트로 만든 -JITTER~+JITTER 값"""
+    return (digest[index % len(digest)] / 255 - 0.5) * 2 * JITTER
+
+
+def _pick(options, digest, index):
+    return options[digest[index % len(digest)] % len(options)]
+
+
+def _scale(position, constraints):
+    """범위 내 위치(0~1)를 실제 값으로 변환 (반올림/타입 변환은 검증 단계에서)"""
+    position = max(0.0, min(1.0, position))
+    return constraints['min'] + (constraints['max'] - constraints['min']) * position
+
+
+def match_rules(name, desc, rules):
+    """이름/설명에 키워드가 하나라도 들어 있는 규칙 목록 (규칙 순서대로)"""
+    text = f"{name or ''} {desc or ''}".casefold()
+    return [rule for rule in rules if any(keyword in text for keyword in rule[0])]
+
+
+def keyword_profile(name, desc):
+    """이름/설명에 맞은 쏠림/효과 규칙 번호 (글자는 비슷해도 핵심 키워드가 다른 설명을 구분하는 데 쓴다)"""
+    text = f"{name or ''} {desc or ''}".casefold()
+    return tuple(i for i, rule in enumerate(STAT_RULES + EFFECT_RULES) if any(keyword in text for keyword in rule[0]))
+
+
+def character_stats(name, desc, constraints):
+    """캐릭터 스탯 원시 값과 reason 을 dict 로 반환 (constraints: backend.STAT_CONSTRAINTS)"""
+    digest = _digest("character", name, desc)
+    matched = match_rules(name, desc, STAT_RULES)
+
+    positions = {key: BASE_POSITION + _jitter(digest, i) for i, key in enumerate(constraints)}
+    for _, bias, _, _ in matched:
+        for key, delta in bias.items():
+            positions[key] += delta
+    stats = {key: _scale(positions[key], constraints[key]) for key in constraints}
+
+    # 키워드로 강조된 스탯에 reason, 모자라면 위치가 높은 스탯 순으로 기본 reason 을 붙인다
+    # (reason 이 붙은 스탯은 정규화 합 보정 때 최대한 유지됨)
+    for i, (_, _, key, reasons) in enumerate(matched):
+        if key is not None and f"{key}_reason" not in stats:
+            stats[f"{key}_reason"] = _pick(reasons, digest, len(constraints) + i)
+    for key in sorted(constraints, key=lambda key: -positions[key]):
+        if sum(1 for stat in stats if stat.endswith("_reason")) >= MIN_REASONS:
+            break
+        stats.setdefault(f"{key}_reason", DEFAULT_REASONS[key])
+    return stats
+
+
+def equipment_stats(part, name, desc, default_bonus, bonus_constraints, effect_constraints, max_effects=3):
+    """장비 bonusType/bonusValue/effects 원시 값을 dict 로 반환.
+    bonusType 은 부위 기본 종류가 키워드와 맞으면 그대로, 아니면 처음 맞은 키워드의 스탯, 없으면 부위 기본 종류"""
+    digest = _digest(part, name, desc)
+    default_type, _ = default_bonus
+    matched = [rule for rule in match_rules(name, desc, STAT_RULES) if rule[2] is not None]
+
+    bonus_types = [f"{rule[2]}Bonus" for rule in matched]
+    bonus_type = default_type if default_type in bonus_types or not bonus_types else bonus_types[0]
+    constraints = bonus_constraints[bonus_type]
+    data = {
+        "bonusType": bonus_type,
+        "bonusValue": _scale(0.5 + BONUS_STEP * len(matched) + _jitter(digest, 0), constraints),
+    }
+    for rule in matched:
+        if f"{rule[2]}Bonus" == bonus_type:
+            data["bonusReason"] = _pick(rule[3], digest, 1)
+            break
+    # reason 은 최소 1개
+    data.setdefault("bonusReason", DEFAULT_REASONS[bonus_type[:-len("Bonus")]])
+
+    effects = []
+    for i, (_, effect_type, reasons) in enumerate(match_rules(name, desc, EFFECT_RULES)[:max_effects]):
+        effects.append({
+            "type": effect_type,
+            "typeReason": _pick(reasons, digest, 2 + i),
+            "chance": 0.15 + digest[8 + i] / 255 * 0.15,
+            "duration": 2 + digest[16 + i] % 2,
+            "bonusIncreasePerTurn": _scale(0.4 + _jitter(digest, 24 + i), effect_constraints["bonusIncreasePerTurn"]),
+        })
+    data["effects"] = effects
+    return data
@@ -0,0 +1,311 @@
+"""
+region_pool.py
+2026.10.17
+여러 리전의 Bedrock 클라이언트 풀 (리전별 상태/지연 시간 추적, 스로틀링 시 다른 리전으로 전환, 선택적 헤지 요청)
+
+BEDROCK_REGIONS="us-east-1,us-west-2" 처럼 리전을 여러 개 지정하면:
+- 호출은 목록 순서대로 정상 상태인 첫 리전으로 보낸다.
+- 스로틀링/일시적 서버 오류가 나면 그 리전을 REGION_COOLDOWN 초 동안 제외하고 다음 리전으로 다시 보낸다.
+- 헤지 모드(BEDROCK_HEDGE_TEXT=1, 텍스트 호출만)에서는 첫 리전이 그 리전/호출 종류의 p95 지연 시간 안에 응답하지 않으면
+  다른 리전에도 같은 요청을 보낸다. 첫 호출은 전용 스레드에서, 헤지 요청은 공유 실행기(hedge_workers 개)에서 실행하고
+  둘 중 먼저 도착한 성공 응답을 바로 돌려준다 (먼저 끝난 쪽이 실패하면 나머지를 기다린다). 진 응답의 본문은 끝나는 대로 닫지만 비용은 두 번 든다.
+리전이 하나면 지연 시간만 기록하고 기존처럼 한 클라이언트로 호출한다.
+"""
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import aws_clients
+import tracing
+
+# 다른 리전으로 다시 보내는 오류 코드 (스로틀링, 모델 준비 중, 일시적 서버 오류)
+FAILOVER_CODES = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "InternalServerException",
+)
+# 응답 코드가 없는 연결 오류 (botocore 예외 클래스 이름)
+FAILOVER_ERRORS = ("EndpointConnectionError", "ConnectTimeoutError", "ReadTimeoutError", "ConnectionClosedError")
+
+
+def is_failover_error(error):
+    """다른 리전으로 다시 보내도 되는 오류인지 여부 (요청 형식 오류 등은 다른 리전에서도 실패하므로 제외)"""
+    code = (getattr(error, "response", None) or {}).get("Error", {}).get("Code")
+    if code is not None:
+        return code in FAILOVER_CODES
+    return type(error).__name__ in FAILOVER_ERRORS
+
+
+def parse_regions(value, default):
+    regions = [region.strip() for region in (value or "").split(",") if region.strip()]
+    return regions or [default]
+
+
+class RegionHealth:
+    """리전 하나의 호출/오류 횟수, 호출 종류(operation)별 최근 지연 시간, 제외 기한"""
+
+    def __init__(self, region, window=200):
+        self.region = region
+        self.window = window
+        self.calls = 0
+        self.errors = 0
+        self.failovers = 0
+        self.cooldown_until = 0.0
+        # operation -> 최근 지연 시간 (스탯 생성과 번역처럼 출력 길이가 다른 호출을 섞지 않도록 따로 기록)
+        self._latencies = {}
+        self._p95 = {}
+        self._dirty = set()
+
+    def healthy(self, now):
+        return now >= self.cooldown_until
+
+    def record_latency(self, seconds, operation=None):
+        latencies = self._latencies.get(operation)
+        if latencies is None:
+            latencies = self._latencies[operation] = deque(maxlen=self.window)
+        latencies.append(seconds)
+        self._dirty.add(operation)
+
+    def percentile(self, percent, operation=None):
+        latencies = self._latencies.get(operation)
+        if not latencies:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * percent / 100) - 1))]
+
+    def p95(self, min_samples, operation=None):
+        """operation 의 최근 지연 시간 p95 (기록이 min_samples 개보다 적으면 None). 기록이 바뀐 뒤 처음 부를 때만 다시 계산"""
+        if len(self._latencies.get(operation, ())) < min_samples:
+            return None
+        if operation in self._dirty:
+            self._p95[operation] = self.percentile(95, operation)
+            self._dirty.discard(operation)
+        return self._p95[operation]
+
+    def to_dict(self, now):
+        latency = {}
+        for operation in self._latencies:
+            p50 = self.percentile(50, operation)
+            p95 = self.percentile(95, operation)
+            latency[operation or "default"] = {"p50Ms": round(p50 * 1000, 3), "p95Ms": round(p95 * 1000, 3)}
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "failovers": self.failovers,
+            "healthy": self.healthy(now),
+            "latency": latency,
+        }
+
+
+class RegionPool:
+    """호출 종류(text / image) 하나에 대한 리전별 클라이언트 풀. 클라이언트와 같은 invoke_model 인터페이스를 제공한다"""
+
+    def __init__(self, profile_name, regions, cooldown=10.0, hedge=False, hedge_min_samples=20,
+                 hedge_min_delay=0.05, hedge_workers=16):
+        self.profile_name = profile_name
+        self.regions = list(regions)
+        self.cooldown = cooldown
+        self.hedge = hedge and len(self.regions) > 1
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_workers = hedge_workers
+        self.health = {region: RegionHealth(region) for region in self.regions}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_env(cls, profile_name):
+        """환경 변수로 구성. BEDROCK_REGIONS 가 없으면 aws_clients 설정의 리전 하나만 사용"""
+        default_region = aws_clients.CLIENT_PROFILES[profile_name]["region"]
+        return cls(
+            profile_name,
+            parse_regions(os.environ.get("BEDROCK_REGIONS"), default_region),
+            cooldown=float(os.environ.get("REGION_COOLDOWN", "10")),
+            hedge=os.environ.get(f"BEDROCK_HEDGE_{profile_name.upper()}", "0") == "1",
+            hedge_min_samples=int(os.environ.get("BEDROCK_HEDGE_MIN_SAMPLES", "20")),
+            hedge_min_delay=float(os.environ.get("BEDROCK_HEDGE_MIN_DELAY", "0.05")),
+        )
+
+    def client(self, region):
+        return aws_clients.get_client(self.profile_name, region)
+
+    def ordered_regions(self):
+        """호출할 리전 순서: 정상 리전(설정 순서) 다음 제외 중인 리전(제외가 빨리 끝나는 순서)"""
+        if len(self.regions) == 1:
+            return self.regions
+        now = time.monotonic()
+        healthy = [region for region in self.regions if self.health[region].healthy(now)]
+        cooling = sorted(
+            (region for region in self.regions if not self.health[region].healthy(now)),
+            key=lambda region: self.health[region].cooldown_until,
+        )
+        return healthy + cooling
+
+    def _call(self, region, method, kwargs, operation=None):
+        """리전 하나로 호출하고 지연 시간/오류 기록"""
+        health = self.health[region]
+        start = time.perf_counter()
+        try:
+            response = getattr(self.client(region), method)(**kwargs)
+        except Exception as e:
+            with self._lock:
+                health.calls += 1
+                health.errors += 1
+                if is_failover_error(e) and len(self.regions) > 1:
+                    health.cooldown_until = time.monotonic() + self.cooldown
+            raise
+        with self._lock:
+            health.calls += 1
+            health.record_latency(time.perf_counter() - start, operation)
+        return response
+
+    def _invoke_with_failover(self, method, kwargs, regions, operation=None):
+        last_error = None
+        for i, region in enumerate(regions):
+            try:
+                return self._call(region, method, kwargs, operation)
+            except Exception as e:
+                if not is_failover_error(e) or i + 1 == len(regions):
+                    raise
+                last_error = e
+                with self._lock:
+                    self.health[region].failovers += 1
+                tracing.incr("RegionFailovers")
+                print(f"{region} 리전 호출 실패, 다른 리전으로 전환합니다: {e}")
+        raise last_error
+
+    def invoke_model(self, operation=None, **kwargs):
+        """정상 리전 순서대로 호출 (스로틀링 시 다음 리전). 헤지 모드면 operation 의 p95 이후 다른 리전에도 요청.
+        operation: 지연 시간을 따로 기록할 호출 종류 ("stat", "translation" 등, 클라이언트에는 넘기지 않음)"""
+        regions = self.ordered_regions()
+        if self.hedge and len(regions) > 1:
+            deadline = self.health[regions[0]].p95(self.hedge_min_samples, operation)
+            if deadline is not None:
+                return self._invoke_hedged(kwargs, regions, max(deadline, self.hedge_min_delay), operation)
+        return self._invoke_with_failover("invoke_model", kwargs, regions, operation)
+
+    def invoke_model_with_response_stream(self, operation=None, **kwargs):
+        """스트리밍 호출 (스트림 시작 전 스로틀링만 다른 리전으로 전환, 헤지하지 않음)"""
+        return self._invoke_with_failover("invoke_model_with_response_stream", kwargs, self.ordered_regions(), operation)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix="hedge")
+        return self._executor
+
+    def _invoke_hedged(self, kwargs, regions, deadline, operation):
+        """첫 리전 호출은 전용 스레드에서 실행하고 (실행기 작업자가 모두 바빠도 기다리지 않도록),
+        deadline 초 안에 끝나지 않으면 나머지 리전으로 헤지 요청을 공유 실행기에 보낸다.
+        먼저 도착한 성공 응답을 돌려주고 진 응답의 본문은 끝나는 대로 닫는다"""
+        primary = _run_in_thread(tracing.bind(self._invoke_with_failover), "invoke_model", kwargs, regions, operation)
+        done, _ = wait([primary], timeout=deadline)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.hedged += 1
+        tracing.incr("HedgedRequests")
+        backup = self._get_executor().submit(
+            tracing.bind(self._invoke_with_failover), "invoke_model", kwargs, regions[1:], operation
+        )
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in (primary, backup) if future in done and future.exception() is None), None)
+            if winner is None:
+                continue
+            # 늦은 호출은 취소할 수 없으므로 끝나면 본문만 닫는다
+            for future in pending:
+                future.add_done_callback(_discard_response)
+            if winner is backup:
+                self._record_hedge_win()
+            return winner.result()
+        # 둘 다 실패하면 첫 호출의 오류
+        return primary.result()
+
+    def _record_hedge_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+        tracing.incr("HedgeWins")
+
+    def warm_up(self):
+        """모든 리전의 클라이언트를 미리 생성"""
+        for region in self.regions:
+            self.client(region)
+        return list(self.regions)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "regions": {region: health.to_dict(now) for region, health in self.health.items()},
+                "hedged": self.hedged,
+                "hedgeWins": self.hedge_wins,
+            }
+
+
+def _close_response(response):
+    """쓰지 않는 invoke_model 응답의 본문(스트림)을 닫아 연결을 돌려준다"""
+    close = getattr(response.get("body"), "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception as e:
+            print(f"헤지 응답 본문 닫기 중 오류 발생: {e}")
+
+
+def _discard_response(future):
+    """진 호출이 끝나면 응답 본문을 닫는다 (실패했으면 할 일 없음)"""
+    if future.exception() is None:
+        _close_response(future.result())
+
+
+def _run_in_thread(fn, *args):
+    """fn(*args) 를 새 데몬 스레드에서 실행하고 결과를 담을 Future 반환"""
+    future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, name="hedge-primary", daemon=True).start()
+    return future
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(profile_name):
+    """호출 종류별 공유 리전 풀 반환 (처음 호출 시 환경 변수로 생성)"""
+    pool = _pools.get(profile_name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(profile_name)
+            if pool is None:
+                pool = _pools[profile_name] = RegionPool.from_env(profile_name)
+    return pool
+
+
+def set_pool(profile_name, pool):
+    """리전 풀 교체 (로컬 대역/벤치마크용)"""
+    with _pools_lock:
+        _pools[profile_name] = pool
+
+
+def reset_pools():
+    with _pools_lock:
+        _pools.clear()
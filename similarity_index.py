@@ -0,0 +1,236 @@
+"""
+similarity_index.py
+2026.10.17
+표현만 조금 다른 반복 요청을 찾는 유사도 색인 (문자 n-gram MinHash + LSH)
+
+정확히 같은 입력만 맞히는 결과 캐시와 달리, "칼날에 맹독이 스며 있다." 와 "칼날에는 맹독이 스며 있다" 처럼
+글자 n-gram 집합의 Jaccard 유사도가 threshold 이상인 이전 결과를 찾는다.
+어순을 바꾸거나 표현을 다시 쓴 설명("작고 날카로운 단검. 독 효과" 와 "독이 묻은 작고 날카로운 단검", Jaccard 약 0.45)은
+기본 threshold(0.8)에서는 찾지 않는다. 그 정도까지 낮추면 "크고 날카로운 장검. 독 효과"(0.65)처럼 다른 장비의 결과도 빌려 오게 된다
+- 서명: one permutation hashing. n-gram 해시를 num_perm 개 구간 중 하나에 넣고 구간별 최솟값을 쓴다
+  (같은 위치 값이 같을 확률 ≈ Jaccard 유사도). 해시를 num_perm 번 계산하는 일반 MinHash 보다 수십 배 빠르며,
+  빈 구간은 모든 입력에 공통인 순서로 다른 구간 값을 빌려 채운다. 문자열 해시는 프로세스마다 달라지므로 서명은 메모리에만 둔다
+- LSH: 서명을 bands 개 구간으로 나눠 구간 값이 같은 항목만 후보로 보고, 서명 일치 비율로 유사도를 추정해 확인.
+  항목에는 서명 값마다 하위 8비트만 남긴 스케치(num_perm 바이트)를 저장한다 (우연히 같을 확률 1/256 은 추정에서 보정)
+- 메모리: 종류별 max_entries 개 (기본 설정에서 항목당 약 1.5KB + 결과 문자열, 64자 캐시 키 포함), 넘치면 오래 쓰이지 않은 항목부터 제거.
+  LSH 구간 하나에는 최근 max_bucket 개만 남겨, 흔한 표현이 많이 쌓여도 조회 비용이 일정하다
+- tag 가 다른 항목은 후보에서 뺀다 (글자는 비슷해도 독/화염처럼 핵심 키워드가 다른 설명을 구분하는 용도)
+- 다른 입력의 결과를 빌려 쓰는 것이므로 기본은 꺼져 있다 (SIMILARITY_ENABLED=1 로 켜고, 기본 threshold 0.8)
+"""
+import os
+import re
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from operator import eq
+
+_MASK = (1 << 61) - 1
+_NON_WORD = re.compile(r'[^\w\s]')
+
+
+def normalize_text(text):
+    """소문자화, 문장 부호 제거, 연속 공백 정리"""
+    return ' '.join(_NON_WORD.sub(' ', str(text or '').casefold()).split())
+
+
+def _probe_orders(num_perm):
+    """빈 구간 j 가 값을 빌려 올 구간 순서 (모든 입력에 같은 순서를 써야 서명끼리 비교할 수 있다)"""
+    return [
+        [hash((j, attempt)) % num_perm for attempt in range(1, num_perm + 1)] + [(j + step) % num_perm for step in range(1, num_perm)]
+        for j in range(num_perm)
+    ]
+
+
+class MinHashIndex:
+    """한 생성 종류의 스레드 안전 유사도 색인"""
+
+    def __init__(self, num_perm=64, bands=16, ngram=2, threshold=0.8, max_entries=10000, min_chars=12,
+                 max_candidates=32, max_bucket=32):
+        if num_perm % bands:
+            raise ValueError("num_perm 은 bands 의 배수여야 합니다.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.min_chars = min_chars
+        self.max_candidates = max_candidates
+        self.max_bucket = max_bucket
+        self._probes = _probe_orders(num_perm)
+        # id -> (스케치, 구간 키, tag, 값, 외부 키), 오래 쓰이지 않은 순서
+        self._entries = OrderedDict()
+        # 외부 키 -> id (같은 키를 다시 넣으면 교체)
+        self._ids = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def signature(self, text):
+        """정규화한 텍스트의 MinHash 서명 (min_chars 보다 짧으면 None: 짧은 입력은 정확히 같을 때만 재사용)"""
+        text = normalize_text(text)
+        if len(text) < self.min_chars:
+            return None
+        n, k = self.ngram, self.num_perm
+        values = [None] * k
+        for i in range(len(text) - n + 1):
+            h = hash(text[i:i + n]) & _MASK
+            slot, value = h % k, h // k
+            current = values[slot]
+            if current is None or value < current:
+                values[slot] = value
+        for j, value in enumerate(values):
+            if value is None:
+                values[j] = next(values[slot] for slot in self._probes[j] if values[slot] is not None)
+        return values
+
+    def _bucket_keys(self, signature):
+        rows = self.rows
+        return array('q', [hash(tuple(signature[i * rows:(i + 1) * rows])) for i in range(self.bands)])
+
+    @staticmethod
+    def _sketch(signature):
+        return bytes(value & 0xFF for value in signature)
+
+    def _similarity(self, sketch, other):
+        """스케치 일치 비율로 추정한 Jaccard 유사도 (하위 8비트가 우연히 같을 확률 보정)"""
+        matched = sum(map(eq, sketch, other)) / self.num_perm
+        return max(0.0, (matched - 1 / 256) / (1 - 1 / 256))
+
+    def add(self, key, text, value, tag=None):
+        """항목 추가 (같은 key 는 교체). 텍스트가 너무 짧으면 추가하지 않고 False 반환"""
+        signature = self.signature(text)
+        if signature is None:
+            return False
+        bucket_keys = self._bucket_keys(signature)
+        with self._lock:
+            old = self._ids.pop(key, None)
+            if old is not None:
+                self._remove(old)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._ids[key] = entry_id
+            self._entries[entry_id] = (self._sketch(signature), bucket_keys, tag, value, key)
+            for bucket, bucket_key in zip(self._buckets, bucket_keys):
+                ids = bucket.get(bucket_key)
+                if ids is None:
+                    bucket[bucket_key] = [entry_id]
+                else:
+                    ids.append(entry_id)
+                    if len(ids) > self.max_bucket:
+                        del ids[0]
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                del self._ids[self._entries[oldest][4]]
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def _remove(self, entry_id):
+        bucket_keys = self._entries.pop(entry_id)[1]
+        for bucket, bucket_key in zip(self._buckets, bucket_keys):
+            ids = bucket.get(bucket_key)
+            if ids is not None and entry_id in ids:
+                ids.remove(entry_id)
+                if not ids:
+                    del bucket[bucket_key]
+
+    def query(self, text, tag=None):
+        """유사도가 threshold 이상인 가장 비슷한 항목의 (값, 추정 유사도, 외부 키) 반환 (없으면 None)"""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        bucket_keys = self._bucket_keys(signature)
+        sketch = self._sketch(signature)
+        with self._lock:
+            # 구간이 많이 겹친 후보부터 max_candidates 개만 확인
+            counts = Counter()
+            for bucket, bucket_key in zip(self._buckets, bucket_keys):
+                ids = bucket.get(bucket_key)
+                if ids:
+                    counts.update(ids)
+            best_id, best_score = None, self.threshold
+            for entry_id, _ in counts.most_common(self.max_candidates):
+                entry = self._entries.get(entry_id)
+                if entry is None:
+                    continue
+                if entry[2] != tag:
+                    continue
+                score = self._similarity(sketch, entry[0])
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            return entry[3], round(best_score, 3), entry[4]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ids.clear()
+            for bucket in self._buckets:
+                bucket.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class SimilarityIndex:
+    """생성 종류별 MinHashIndex 묶음 (종류마다 처음 쓸 때 생성)"""
+
+    def __init__(self, **index_options):
+        self.index_options = index_options
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """환경 변수로 구성 (SIMILARITY_ENABLED=1 일 때만 사용, 아니면 None)"""
+        if os.environ.get("SIMILARITY_ENABLED", "0") != "1":
+            return None
+        return cls(
+            num_perm=int(os.environ.get("SIMILARITY_NUM_PERM", "64")),
+            bands=int(os.environ.get("SIMILARITY_BANDS", "16")),
+            ngram=int(os.environ.get("SIMILARITY_NGRAM", "2")),
+            threshold=float(os.environ.get("SIMILARITY_THRESHOLD", "0.8")),
+            max_entries=int(os.environ.get("SIMILARITY_MAX_ENTRIES", "10000")),
+            min_chars=int(os.environ.get("SIMILARITY_MIN_CHARS", "12")),
+        )
+
+    def index(self, kind):
+        index = self._indexes.get(kind)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(kind)
+                if index is None:
+                    index = self._indexes[kind] = MinHashIndex(**self.index_options)
+        return index
+
+    def add(self, kind, key, text, value, tag=None):
+        return self.index(kind).add(key, text, value, tag)
+
+    def lookup(self, kind, text, tag=None):
+        """kind 종류에서 text 와 비슷한 이전 결과의 (값, 추정 유사도, 외부 키) 반환 (없으면 None)"""
+        return self.index(kind).query(text, tag)
+
+    def clear(self):
+        for index in list(self._indexes.values()):
+            index.clear()
+
+    def stats(self):
+        return {kind: index.stats() for kind, index in list(self._indexes.items())}
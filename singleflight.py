@@ -0,0 +1,161 @@
+"""
+singleflight.py
+2026.10.17
+같은 요청이 동시에 여러 번 들어오면 한 번만 실행하고 결과를 나눠 주는 요청 병합(coalescing)
+"""
+import os
+import threading
+from concurrent.futures import Future
+
+import tracing
+
+_LEADER = "leader"
+_WAITER = "waiter"
+_OVERFLOW = "overflow"
+
+
+class SingleFlight:
+    """키별로 진행 중인 호출을 하나만 유지하는 스레드 안전 병합기.
+    같은 키로 호출이 진행 중이면 새 호출자는 그 결과를 기다려 함께 받고, 실행 중 예외가 나면 기다리던 모든 호출자에게 같은 예외를 던진다.
+    max_waiters: 호출 하나를 기다릴 수 있는 최대 호출자 수 (넘으면 기다리지 않고 직접 실행, None 이면 제한 없음)"""
+
+    def __init__(self, max_waiters=None):
+        self.max_waiters = max_waiters
+        self._calls = {}  # 키 → [Future, 대기자 수]
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+        self.overflows = 0
+
+    @classmethod
+    def from_env(cls):
+        """환경 변수로 구성 (SINGLEFLIGHT_ENABLED=0 이면 None)"""
+        if os.environ.get("SINGLEFLIGHT_ENABLED", "1") == "0":
+            return None
+        max_waiters = int(os.environ.get("SINGLEFLIGHT_MAX_WAITERS", "64"))
+        return cls(max_waiters=max_waiters if max_waiters > 0 else None)
+
+    def _claim(self, key, start):
+        """진행 중인 호출에 합류하거나 start() 로 새 Future 를 만들어 등록. (역할, Future) 반환"""
+        with self._lock:
+            entry = self._calls.get(key)
+            if entry is None:
+                future = start()
+                self._calls[key] = [future, 0]
+                self.leaders += 1
+                return _LEADER, future
+            if self.max_waiters is None or entry[1] < self.max_waiters:
+                entry[1] += 1
+                self.shared += 1
+                return _WAITER, entry[0]
+            # 대기자가 너무 많으면 병합하지 않고 직접 실행
+            self.overflows += 1
+            return _OVERFLOW, None
+
+    def _forget(self, key, future):
+        with self._lock:
+            entry = self._calls.get(key)
+            if entry is not None and entry[0] is future:
+                del self._calls[key]
+
+    def do(self, key, func, *args, **kwargs):
+        """func(*args, **kwargs) 를 키별로 한 번만 실행. (결과, 다른 호출의 결과를 받았는지 여부) 반환"""
+        role, future = self._claim(key, Future)
+        if role == _OVERFLOW:
+            return func(*args, **kwargs), False
+        if role == _WAITER:
+            tracing.incr("CoalescedRequests")
+            return future.result(), True
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._forget(key, future)
+
+    def submit(self, key, executor, func, *args, **kwargs):
+        """do() 의 비동기 버전. executor 에서 실행 중인 같은 키의 작업이 있으면 그 Future 를 반환.
+        대기자는 작업 스레드를 차지하지 않는다. (Future, 다른 호출의 결과를 받는지 여부) 반환"""
+        role, future = self._claim(key, lambda: executor.submit(func, *args, **kwargs))
+        if role == _OVERFLOW:
+            return executor.submit(func, *args, **kwargs), False
+        if role == _WAITER:
+            tracing.incr("CoalescedRequests")
+            return future, True
+        # 락을 놓은 뒤 등록 (이미 끝난 Future 는 콜백이 바로 실행된다)
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """병합 카운터 반환"""
+        return {
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "overflows": self.overflows,
+            "inFlight": self.in_flight(),
+        }
+
+
+class AsyncSingleFlight:
+    """SingleFlight 의 asyncio 버전 (이벤트 루프 하나에서만 사용).
+    같은 키로 진행 중인 코루틴이 있으면 새 호출자는 그 Task 를 기다린다. 한 호출자가 취소되어도 Task 는 계속 실행된다."""
+
+    def __init__(self, max_waiters=None):
+        self.max_waiters = max_waiters
+        self._calls = {}  # 키 → [Task, 대기자 수]
+        self.leaders = 0
+        self.shared = 0
+        self.overflows = 0
+
+    @classmethod
+    def from_env(cls):
+        """SingleFlight.from_env 와 같은 환경 변수 사용"""
+        if os.environ.get("SINGLEFLIGHT_ENABLED", "1") == "0":
+            return None
+        max_waiters = int(os.environ.get("SINGLEFLIGHT_MAX_WAITERS", "64"))
+        return cls(max_waiters=max_waiters if max_waiters > 0 else None)
+
+    async def do(self, key, func, *args, **kwargs):
+        """await func(*args, **kwargs) 를 키별로 한 번만 실행. (결과, 다른 호출의 결과를 받았는지 여부) 반환"""
+        # 동기 경로(Lambda)의 import 비용을 늘리지 않도록 여기서 불러옴
+        import asyncio
+        entry = self._calls.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._calls[key] = [task, 0]
+            self.leaders += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+            return await asyncio.shield(task), False
+        if self.max_waiters is not None and entry[1] >= self.max_waiters:
+            self.overflows += 1
+            return await func(*args, **kwargs), False
+        entry[1] += 1
+        self.shared += 1
+        tracing.incr("CoalescedRequests")
+        return await asyncio.shield(entry[0]), True
+
+    def _forget(self, key, task):
+        entry = self._calls.get(key)
+        if entry is not None and entry[0] is task:
+            del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def stats(self):
+        """병합 카운터 반환"""
+        return {
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "overflows": self.overflows,
+            "inFlight": self.in_flight(),
+        }
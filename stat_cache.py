@@ -0,0 +1,213 @@
+"""
+stat_cache.py
+2026.10.17
+스탯 생성 결과 캐시 (프로세스 내 LRU + 선택적 SQLite 영속 계층)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(kind, name, description, model_id, prompt_version):
+    """(생성기 종류, 정제된 이름, 정제된 설명, 모델 ID, 프롬프트 버전) 기반 캐시 키 생성"""
+    raw = json.dumps([kind, name, description, model_id, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """TTL과 최대 크기를 가진 스레드 안전 LRU 캐시"""
+
+    def __init__(self, max_size=1024, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                # 만료된 항목 제거
+                del self._data[key]
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """warm Lambda 컨테이너나 Streamlit 프로세스가 공유할 수 있는 SQLite 캐시 계층"""
+
+    def __init__(self, path, max_rows=10000, ttl=86400):
+        # 영속 캐시를 설정한 경우에만 필요하므로 여기서 불러옴
+        import sqlite3
+        self.Error = sqlite3.Error
+        self.path = path
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stat_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_stat_cache_accessed ON stat_cache(accessed_at)")
+        self._conn.commit()
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM stat_cache").fetchone()[0]
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM stat_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM stat_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._rows -= 1
+                self.evictions += 1
+                return None
+            self._conn.execute("UPDATE stat_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR REPLACE INTO stat_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            self._rows += cur.rowcount if cur.rowcount > 0 else 0
+            if self._rows > self.max_rows:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """만료 항목을 먼저 지우고, 그래도 넘치면 가장 오래 사용되지 않은 항목 제거"""
+        cur = self._conn.execute("DELETE FROM stat_cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        removed = max(cur.rowcount, 0)
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM stat_cache").fetchone()[0]
+        overflow = self._rows - self.max_rows
+        if overflow > 0:
+            cur = self._conn.execute(
+                "DELETE FROM stat_cache WHERE key IN "
+                "(SELECT key FROM stat_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            removed += max(cur.rowcount, 0)
+            self._rows -= max(cur.rowcount, 0)
+        self.evictions += removed
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM stat_cache")
+            self._conn.commit()
+            self._rows = 0
+
+
+class StatCache:
+    """메모리 LRU 계층 + 선택적 영속 계층으로 구성된 2단 캐시"""
+
+    def __init__(self, max_size=1024, ttl=3600, persistent_path=None, persistent_max_rows=10000, persistent_ttl=86400):
+        self.memory = LRUCache(max_size=max_size, ttl=ttl)
+        self.persistent = None
+        if persistent_path:
+            import sqlite3
+            try:
+                self.persistent = SQLiteCache(persistent_path, max_rows=persistent_max_rows, ttl=persistent_ttl)
+            except sqlite3.Error as e:
+                print(f"영속 캐시를 열 수 없어 메모리 캐시만 사용합니다: {e}")
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    @classmethod
+    def from_env(cls):
+        """환경 변수로 캐시 구성 (STAT_CACHE_ENABLED=0 이면 None)"""
+        if os.environ.get("STAT_CACHE_ENABLED", "1") == "0":
+            return None
+        return cls(
+            max_size=int(os.environ.get("STAT_CACHE_SIZE", "1024")),
+            ttl=float(os.environ.get("STAT_CACHE_TTL", "3600")),
+            persistent_path=os.environ.get("STAT_CACHE_PATH"),
+            persistent_max_rows=int(os.environ.get("STAT_CACHE_MAX_ROWS", "10000")),
+            persistent_ttl=float(os.environ.get("STAT_CACHE_PERSISTENT_TTL", "86400")),
+        )
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.persistent is not None:
+            try:
+                value = self.persistent.get(key)
+            except self.persistent.Error as e:
+                print(f"영속 캐시 조회 중 오류 발생: {e}")
+                value = None
+            if value is not None:
+                self.persistent_hits += 1
+                # 영속 계층에서 찾은 값은 메모리 계층으로 승격
+                self.memory.set(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, value)
+            except self.persistent.Error as e:
+                print(f"영속 캐시 저장 중 오류 발생: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def stats(self):
+        """hit/miss 카운터 반환"""
+        return {
+            "hits": self.hits,
+            "persistentHits": self.persistent_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "memoryEntries": len(self.memory),
+            "memoryEvictions": self.memory.evictions,
+            "persistentEvictions": self.persistent.evictions if self.persistent is not None else 0,
+        }
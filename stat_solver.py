@@ -0,0 +1,105 @@
+"""
+stat_solver.py
+2026.10.17
+캐릭터 스탯 정규화 합 제약을 로컬에서 만족시키는 투영(projection) 솔버
+"""
+import math
+
+# 정규화 점수 = Σ (stat / 정규화 기준값) × 가중치
+STAT_WEIGHTS = {
+    'hp': (200, 0.18),
+    'attack': (25, 0.18),
+    'defense': (20, 0.13),
+    'criticalChance': (0.30, 0.12),
+    'criticalDamage': (3.0, 0.10),
+    'speed': (90, 0.12),
+    'dodgeChance': (0.25, 0.09),
+    'accuracy': (0.98, 0.08),
+}
+
+SCORE_MIN = 0.8
+SCORE_MAX = 1.2
+
+
+def normalized_score(stats):
+    """프롬프트의 정규화 합 수식으로 점수 계산"""
+    return sum(stats[key] / norm * weight for key, (norm, weight) in STAT_WEIGHTS.items())
+
+
+def _step(constraints):
+    """스탯의 최소 표기 단위 (정수 또는 소수점 자리)"""
+    if constraints['type'] == int:
+        return 1
+    return 10 ** -constraints.get('round', 2)
+
+
+def _round_toward(value, constraints, direction):
+    """조정 방향으로 표기 단위에 맞춰 올림/내림 후 범위 제한"""
+    step = _step(constraints)
+    units = value / step
+    # 부동소수점 오차로 한 단위가 더 움직이는 것을 방지
+    units = math.ceil(units - 1e-9) if direction > 0 else math.floor(units + 1e-9)
+    value = max(constraints['min'], min(constraints['max'], units * step))
+    if constraints['type'] == int:
+        return int(round(value))
+    return round(value, constraints.get('round', 2))
+
+
+def _distribute(keys, stats, constraints, need, direction):
+    """keys 스탯만 움직여 점수를 need 만큼 이동.
+    각 스탯의 (범위 대비) 변화량 제곱합이 최소가 되도록 가중치 비례로 분배하고, 범위 끝에 닿은 스탯은 고정.
+    반환값: (스탯별 변화량, 남은 점수)"""
+    items = []
+    for key in keys:
+        norm, weight = STAT_WEIGHTS[key]
+        a = weight / norm
+        span = constraints[key]['max'] - constraints[key]['min']
+        k = a * span * span
+        cap = constraints[key]['max'] - stats[key] if direction > 0 else stats[key] - constraints[key]['min']
+        if cap > 0 and k > 0:
+            items.append((cap / k, key, a, k, cap))
+    items.sort()
+
+    deltas = {}
+    saturated = 0.0
+    slope = sum(a * k for _, _, a, k, _ in items)
+    lam = None
+    for t, key, a, k, cap in items:
+        if saturated + slope * t >= need:
+            lam = (need - saturated) / slope
+            break
+        saturated += a * cap
+        slope -= a * k
+        deltas[key] = cap
+
+    if lam is None:
+        # 모든 스탯이 범위 끝에 닿아도 부족한 경우
+        return {key: cap for _, key, _, _, cap in items}, need - saturated
+    for _, key, a, k, cap in items:
+        if key not in deltas:
+            deltas[key] = lam * k
+    return deltas, 0.0
+
+
+def rebalance_stats(stats, constraints, emphasized=(), score_min=SCORE_MIN, score_max=SCORE_MAX):
+    """정규화 점수가 [score_min, score_max]를 벗어난 스탯을 가장 작은 변화로 허용 범위 안으로 이동.
+    emphasized(reason이 붙은 스탯)는 나머지 스탯만으로 부족할 때에만 움직인다."""
+    score = normalized_score(stats)
+    if score_min <= score <= score_max:
+        return stats
+
+    direction = 1 if score < score_min else -1
+    need = (score_min - score) if direction > 0 else (score - score_max)
+
+    free = [key for key in STAT_WEIGHTS if key not in emphasized]
+    fixed = [key for key in STAT_WEIGHTS if key in emphasized]
+
+    result = dict(stats)
+    for keys in (free, fixed):
+        if need <= 0 or not keys:
+            continue
+        deltas, need = _distribute(keys, result, constraints, need, direction)
+        for key, delta in deltas.items():
+            result[key] = _round_toward(result[key] + direction * delta, constraints[key], direction)
+    return result
+
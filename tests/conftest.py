@@ -0,0 +1,19 @@
+"""
+conftest.py
+2026.10.17
+테스트 공통 설정: 저장소 루트의 모듈을 불러올 수 있게 하고, 네트워크 대신 fake_aws 대역을 쓴다
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import aws_clients  # noqa: E402
+import fake_aws  # noqa: E402
+
+# 테스트 중 Bedrock/S3 를 실수로 호출하지 않도록 모든 프로필에 대역을 넣는다
+aws_clients.set_client("text", fake_aws.FakeBedrockRuntime())
+aws_clients.set_client("image", fake_aws.FakeBedrockRuntime())
+aws_clients.set_client("s3", fake_aws.FakeS3())
@@ -0,0 +1,72 @@
+"""
+test_batch.py
+2026.10.17
+generate_batch 동시 실행 상한과 시간 초과 처리
+"""
+import threading
+import time
+
+import pytest
+
+import backend
+
+
+@pytest.fixture
+def slots(monkeypatch):
+    """동시 실행 상한을 2로 줄인 자리"""
+    semaphore = threading.BoundedSemaphore(2)
+    monkeypatch.setattr(backend, "_batch_slots", semaphore)
+    return semaphore
+
+
+class ConcurrencyProbe:
+    """handler 동시 실행 수의 최댓값을 기록"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.all_done = threading.Event()
+        self.finished = 0
+
+    def __call__(self, item):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays[item["index"]])
+            return {"index": item["index"]}
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.finished += 1
+                if self.finished == len(self.delays):
+                    self.all_done.set()
+
+
+def test_results_keep_input_order(slots):
+    probe = ConcurrencyProbe([0.02, 0.0, 0.01])
+    results = backend.generate_batch([{"index": i} for i in range(3)], handler=probe, max_workers=3, item_timeout=0)
+    assert [r["result"]["index"] for r in results] == [0, 1, 2]
+    assert all(r["isSuccess"] for r in results)
+    assert probe.peak <= 2
+
+
+def test_timed_out_calls_keep_their_slot(slots):
+    before = backend.get_batch_stats()
+    # 앞의 두 항목은 시간 초과 후에도 계속 실행된다
+    probe = ConcurrencyProbe([0.5, 0.5] + [0.01] * 4)
+    first = backend.generate_batch([{"index": i} for i in range(2)], handler=probe, max_workers=2, item_timeout=0.05)
+    assert [r["isSuccess"] for r in first] == [False, False]
+    assert backend.get_batch_stats()["abandoned"] - before["abandoned"] == 2
+
+    # 다음 배치는 버려진 호출이 끝나 자리가 날 때까지 기다린다
+    second = backend.generate_batch([{"index": i} for i in range(2, 6)], handler=probe, max_workers=4, item_timeout=2)
+    assert all(r["isSuccess"] for r in second)
+    assert probe.all_done.wait(5)
+    assert probe.peak <= 2
+
+    after = backend.get_batch_stats()
+    assert after["timeouts"] - before["timeouts"] == 2
+    assert after["abandoned"] == before["abandoned"]
@@ -0,0 +1,105 @@
+"""
+test_bulk_pipeline.py
+2026.10.17
+대량 생성 파이프라인 온디맨드 모드: 입력 순서 유지, 체크포인트에서 이어서 처리
+"""
+import json
+
+import pytest
+
+import bulk_pipeline
+
+ITEMS = [{"kind": "character", "name": f"골렘 {i}", "description": f"바위처럼 단단한 골렘 {i}"} for i in range(1, 7)]
+
+
+class Interrupted(Exception):
+    """실행 도중 멈춘 상황 흉내"""
+
+
+@pytest.fixture
+def paths(tmp_path):
+    source = tmp_path / "items.jsonl"
+    lines = [json.dumps(item, ensure_ascii=False) for item in ITEMS]
+    # 빈 줄은 건너뛰고 줄 번호만 센다
+    lines.insert(2, "")
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(source), str(tmp_path / "results.jsonl")
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """generate_record 로 처리한 줄 번호 기록. stop_at 줄에서 Interrupted 를 던진다"""
+    generate_record = bulk_pipeline.generate_record
+    seen = []
+
+    def record(line, item, error):
+        if line == record.stop_at:
+            raise Interrupted()
+        seen.append(line)
+        return generate_record(line, item, error)
+
+    record.stop_at = None
+    record.seen = seen
+    monkeypatch.setattr(bulk_pipeline, "generate_record", record)
+    return record
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_output_keeps_input_order(paths, calls):
+    source, output = paths
+    state = bulk_pipeline.run_ondemand(source, output, concurrency=3)
+    rows = read_rows(output)
+    assert [row["line"] for row in rows] == [1, 2, 4, 5, 6, 7]
+    assert [row["name"] for row in rows] == [item["name"] for item in ITEMS]
+    assert all(row["isSuccess"] for row in rows)
+    assert (state["succeeded"], state["failed"], state["done"]) == (6, 0, True)
+
+
+def test_resume_skips_checkpointed_lines(paths, calls):
+    source, output = paths
+    calls.stop_at = 6
+    with pytest.raises(Interrupted):
+        bulk_pipeline.run_ondemand(source, output, concurrency=1, checkpoint_every=3)
+    # 세 항목마다 체크포인트: 줄 4까지 처리했고, 체크포인트 뒤 줄 5 는 출력에만 쓰였다
+    checkpoint = bulk_pipeline.load_checkpoint(output, source, "ondemand")
+    assert (checkpoint["line"], checkpoint["succeeded"], checkpoint["done"]) == (5, 3, False)
+    assert [row["line"] for row in read_rows(output)] == [1, 2, 4, 5]
+
+    calls.stop_at = None
+    calls.seen.clear()
+    state = bulk_pipeline.run_ondemand(source, output, concurrency=1, checkpoint_every=3)
+    # 체크포인트 이후 줄만 다시 생성하고, 그 뒤에 쓰였던 출력은 잘라 내고 다시 쓴다
+    assert calls.seen == [5, 6, 7]
+    rows = read_rows(output)
+    assert [row["line"] for row in rows] == [1, 2, 4, 5, 6, 7]
+    assert (state["succeeded"], state["done"]) == (6, True)
+
+    # 끝난 작업을 다시 실행하면 아무것도 생성하지 않는다
+    calls.seen.clear()
+    bulk_pipeline.run_ondemand(source, output, concurrency=1, checkpoint_every=3)
+    assert calls.seen == []
+    assert len(read_rows(output)) == 6
+
+
+def test_checkpoint_of_other_input_is_rejected(paths, calls, tmp_path):
+    source, output = paths
+    bulk_pipeline.run_ondemand(source, output, concurrency=2)
+    other = tmp_path / "other.jsonl"
+    other.write_text(json.dumps(ITEMS[0], ensure_ascii=False) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        bulk_pipeline.run_ondemand(str(other), output)
+
+
+def test_invalid_lines_are_reported(tmp_path, calls):
+    source = tmp_path / "items.jsonl"
+    source.write_text('{"kind": "dragon", "description": "용"}\nnot json\n[1, 2]\n', encoding="utf-8")
+    output = str(tmp_path / "results.jsonl")
+    state = bulk_pipeline.run_ondemand(str(source), output)
+    rows = read_rows(output)
+    assert [(row["line"], row["isSuccess"]) for row in rows] == [(1, False), (2, False), (3, False)]
+    assert rows[1]["message"].startswith("입력 형식 오류")
+    assert state["failed"] == 3
@@ -0,0 +1,92 @@
+"""
+test_catalog.py
+2026.10.17
+생성 기록 저장소 (Catalog / SQLiteCatalog)
+"""
+import io
+import json
+
+import pytest
+
+import backend
+import catalog
+from catalog import Catalog
+
+DAGGER = {
+    "bonusType": "attackBonus",
+    "bonusValue": 6,
+    "effects": [{"type": "poison", "chance": 0.25, "duration": 2, "bonusIncreasePerTurn": 5}],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    catalog_ = Catalog(path=str(tmp_path / "catalog.sqlite3"))
+    yield catalog_
+    catalog_.flush()
+    if catalog_.store is not None:
+        catalog_.store.close()
+
+
+def test_record_flush_and_find(store):
+    assert store.record("weapon", "맹독 단검", "독이 묻은 단검", DAGGER, model_id="model")
+    store.record("weapon", "나무 몽둥이", "가벼운 몽둥이", dict(DAGGER, bonusValue=2, effects=[]))
+    store.record("character", "골렘", "단단한 골렘", {"hp": 150, "attack": 12})
+    store.flush()
+    assert store.stats()["recorded"] == 3
+
+    # bonusType → bonusValue, 효과별 값(<type>.<필드>)으로 범위 조회
+    found = store.find("weapon", {"attackBonus": (6, None)})
+    assert [record["name"] for record in found] == ["맹독 단검"]
+    assert found[0]["stats"] == DAGGER
+    assert found[0]["modelId"] == "model"
+    assert [record["name"] for record in store.find("weapon", {"poison.chance": (0.2, 0.3)})] == ["맹독 단검"]
+    assert store.find("weapon", {"attackBonus": (7, None)}) == []
+    assert [record["name"] for record in store.find(ranges={"hp": (None, 150)})] == ["골렘"]
+
+
+def test_lookup_ignores_whitespace_and_case(store):
+    store.record("weapon", "Venom  Dagger", "독이 묻은   단검", DAGGER)
+    record = store.lookup("weapon", "venom dagger", " 독이 묻은 단검 ")
+    assert record is not None and record["stats"] == DAGGER
+    assert store.lookup("hat", "venom dagger", "독이 묻은 단검") is None
+
+
+def test_rerecord_updates_stats_and_keeps_created_at(store):
+    store.record("weapon", "맹독 단검", "독이 묻은 단검", DAGGER, image_url="https://example.com/a.png")
+    first = store.lookup("weapon", "맹독 단검", "독이 묻은 단검")
+    store.record("weapon", "맹독 단검", "독이 묻은 단검", dict(DAGGER, bonusValue=8))
+    second = store.lookup("weapon", "맹독 단검", "독이 묻은 단검")
+
+    assert store.store.count("weapon") == 1
+    assert second["stats"]["bonusValue"] == 8
+    assert second["createdAt"] == first["createdAt"]
+    # 이미지 URL 없이 다시 기록하면 기존 URL 유지
+    assert second["imageUrl"] == "https://example.com/a.png"
+    assert [record["name"] for record in store.find("weapon", {"attackBonus": (8, 8)})] == ["맹독 단검"]
+
+
+def test_export_jsonl_streams_all_records(store):
+    for i in range(5):
+        store.record("weapon", f"단검 {i}", "독이 묻은 단검", DAGGER)
+    fp = io.StringIO()
+    assert store.export_jsonl(fp, kind="weapon", batch_size=2) == 5
+    names = [json.loads(line)["name"] for line in fp.getvalue().splitlines()]
+    assert names == [f"단검 {i}" for i in range(5)]
+
+
+def test_unavailable_store_does_not_raise(tmp_path):
+    broken = Catalog(path=str(tmp_path / "missing" / "catalog.sqlite3"))
+    assert broken.find("weapon") == []
+    assert broken.stats()["available"] is False
+    assert not broken.record("weapon", "단검", "독이 묻은 단검", DAGGER)
+
+
+def test_generated_stats_are_recorded(store, monkeypatch):
+    monkeypatch.setattr(catalog, "_catalog", store)
+    monkeypatch.setattr(catalog, "_catalog_loaded", True)
+    data, meta = backend.generate_stat_with_meta("weapon", "기록용 단검", "카탈로그 테스트용 단검", use_cache=False)
+    assert meta["fallback"] is None
+    record = store.lookup("weapon", "기록용 단검", "카탈로그 테스트용 단검")
+    assert record["stats"] == data
+    assert record["modelId"] == backend.MODEL_ID
@@ -0,0 +1,48 @@
+"""
+test_json_scanner.py
+2026.10.17
+스트리밍 텍스트에서 최상위 JSON 객체의 끝을 찾는 JsonObjectScanner
+"""
+import json
+
+import pytest
+
+from backend import JsonObjectScanner
+
+NESTED = '{"bonusType": "attackBonus", "effects": [{"type": "poison", "typeReason": "독 {중독}", "duration": 2}]}'
+
+
+def scan(chunks):
+    """조각을 차례로 넣어 (조각 번호, 종료 위치) 반환 (닫히지 않았으면 None)"""
+    scanner = JsonObjectScanner()
+    for i, chunk in enumerate(chunks):
+        end = scanner.feed(chunk)
+        if end >= 0:
+            return i, end
+    return None
+
+
+def test_finds_end_of_nested_object():
+    assert scan([NESTED + "\n뒤에 붙은 설명"]) == (0, len(NESTED))
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16])
+def test_chunk_boundaries_do_not_matter(size):
+    text = "다음은 결과입니다.\n" + NESTED + " 끝"
+    chunks = [text[i:i + size] for i in range(0, len(text), size)]
+    index, end = scan(chunks)
+    assert "".join(chunks[:index]) + chunks[index][:end] == text[:text.index(NESTED) + len(NESTED)]
+
+
+def test_braces_inside_strings_are_ignored():
+    text = '{"reason": "닫는 괄호 } 와 따옴표 \\" 가 있다"}'
+    assert json.loads(text)
+    assert scan([text]) == (0, len(text))
+
+
+def test_text_before_object_is_skipped():
+    assert scan(['"인용" } 잡담 ', '{"a": 1}']) == (1, 8)
+
+
+def test_unclosed_object_returns_none():
+    assert scan(['{"a": {"b": 1}']) is None
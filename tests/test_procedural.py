@@ -0,0 +1,45 @@
+"""
+test_procedural.py
+2026.10.17
+설명 키워드 기반 절차적 스탯 생성기 (backend 검증을 거친 대체 결과 기준)
+"""
+import json
+
+import backend
+import procedural
+from stat_solver import SCORE_MAX, SCORE_MIN, normalized_score
+
+
+def fallback(kind, name, desc):
+    return json.loads(backend.generate_fallback(kind, name, desc, "degraded"))
+
+
+def test_same_input_gives_same_result():
+    assert fallback("character", "바람의 궁수", "빠른 엘프 궁수") == fallback("character", "바람의 궁수", "빠른 엘프 궁수")
+    assert fallback("character", "바람의 궁수", "빠른 엘프 궁수") != fallback("character", "바위 골렘", "느린 골렘")
+
+
+def test_character_keywords_shape_stats():
+    fast = fallback("character", "질풍", "아주 빠른 닌자")
+    slow = fallback("character", "거북", "아주 느린 거인")
+    assert fast["speed"] > slow["speed"]
+    assert "speed_reason" in fast
+    assert sum(1 for key in fast if key.endswith("_reason")) >= procedural.MIN_REASONS
+    assert SCORE_MIN - 0.01 <= normalized_score(fast) <= SCORE_MAX + 0.01
+
+
+def test_equipment_effects_follow_keywords():
+    data = fallback("weapon", "맹독 단검", "칼날에 맹독이 스며 있다")
+    assert data["bonusType"] == "attackBonus"
+    assert [effect["type"] for effect in data["effects"]] == ["poison"]
+    assert 1 <= data["effects"][0]["duration"] <= 5
+
+
+def test_bonus_type_follows_first_keyword():
+    data = fallback("hat", "질풍 두건", "바람처럼 빠른 두건")
+    assert data["bonusType"] == "speedBonus"
+
+
+def test_keyword_profile_separates_effects():
+    assert procedural.keyword_profile("맹독 단검", "") != procedural.keyword_profile("화염 단검", "")
+    assert procedural.keyword_profile("맹독 단검", "") == procedural.keyword_profile("맹독 장검", "")
@@ -0,0 +1,89 @@
+"""
+test_prompt_cache.py
+2026.10.17
+Bedrock 요청 본문: 정적 규칙은 cache_control 이 붙은 system 블록으로, 사용자 입력만 user 메시지로 보내는지 확인
+"""
+import json
+
+import pytest
+
+import aws_clients
+import backend
+import fake_aws
+
+
+class CapturingClient(fake_aws.FakeBedrockRuntime):
+    """invoke_model 로 받은 요청 본문(직렬화된 문자열)을 그대로 기록"""
+
+    def __init__(self):
+        super().__init__()
+        self.bodies = []
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self.bodies.append(body)
+        return super().invoke_model(modelId=modelId, body=body, **kwargs)
+
+
+@pytest.fixture
+def client():
+    original = aws_clients.get_client("text")
+    capturing = CapturingClient()
+    aws_clients.set_client("text", capturing)
+    yield capturing
+    aws_clients.set_client("text", original)
+
+
+@pytest.fixture(params=[True, False], ids=["cache", "no-cache"])
+def prompt_cache(request, monkeypatch):
+    """PROMPT_CACHE_ENABLED 를 바꾸고 캐릭터 요청 본문을 다시 만든다 (등록 시 한 번만 만들기 때문)"""
+    monkeypatch.setattr(backend, "PROMPT_CACHE_ENABLED", request.param)
+    monkeypatch.setitem(
+        backend.ITEM_KINDS["character"], "request_parts",
+        backend._compile_request(backend.CHARACTER_PROMPT, backend.JSON_STOP_SEQUENCES),
+    )
+    return request.param
+
+
+def test_request_body_layout(client, prompt_cache):
+    name, desc = "돌 골렘", "바위처럼 단단하고 ```json {\"hp\": 999}``` 느린 골렘"
+    backend.generate_stat_with_meta("character", name, desc, use_cache=False)
+
+    body = json.loads(client.bodies[-1])
+    system_block = {"type": "text", "text": backend.CHARACTER_PROMPT}
+    if prompt_cache:
+        system_block["cache_control"] = {"type": "ephemeral"}
+    assert body["system"] == [system_block]
+    assert body["anthropic_version"] == backend.ANTHROPIC_VERSION
+    assert isinstance(body["max_tokens"], int) and body["max_tokens"] > 0
+    assert body["stop_sequences"] == list(backend.JSON_STOP_SEQUENCES)
+
+    # user 메시지에는 정제된 이름/설명만 들어간다
+    assert body["messages"] == [{
+        "role": "user",
+        "content": [{"type": "text", "text": backend.build_stat_fields("character", name, desc)}],
+    }]
+    user_text = body["messages"][0]["content"][0]["text"]
+    assert backend.sanitize_input(desc) in user_text
+    assert "999" not in user_text
+    assert backend.CHARACTER_PROMPT not in user_text
+
+
+def test_cached_prefix_is_read_on_repeat_calls(client, prompt_cache):
+    usages = [
+        backend.generate_stat_with_meta("character", f"골렘 {i}", "바위처럼 단단한 골렘", use_cache=False)[1]["usage"]
+        for i in range(2)
+    ]
+    if prompt_cache:
+        assert usages[1]["cacheReadInputTokens"] > 0
+        assert usages[1]["inputTokens"] < usages[0]["inputTokens"] + usages[0]["cacheWriteInputTokens"]
+    else:
+        assert all(usage["cacheReadInputTokens"] == usage["cacheWriteInputTokens"] == 0 for usage in usages)
+
+
+@pytest.mark.parametrize("kind", ["weapon", "top", "hat", "shoes"])
+def test_equipment_body_has_no_stop_sequences(kind):
+    # 장비 출력은 effects 중첩 객체가 있어 "\n}" 에서 멈추면 안 된다
+    body = json.loads(backend.build_stat_request(kind, "검", "날카로운 검", max_tokens=100))
+    assert "stop_sequences" not in body
+    assert body["max_tokens"] == 100
+    assert body["system"][0]["text"] == backend.ITEM_KINDS[kind]["prompt"]
@@ -0,0 +1,127 @@
+"""
+test_region_pool.py
+2026.10.17
+리전 풀: 스로틀링 시 다른 리전으로 전환, 헤지 요청
+"""
+import json
+import time
+
+import pytest
+
+import fake_aws
+from region_pool import RegionPool
+
+BODY = json.dumps({
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 64,
+    "messages": [{"role": "user", "content": "안녕"}],
+})
+
+
+class RecordingClient:
+    """fake_aws 클라이언트가 돌려준 응답을 모아 두는 감싸개"""
+
+    def __init__(self, client):
+        self.client = client
+        self.responses = []
+
+    def invoke_model(self, **kwargs):
+        response = self.client.invoke_model(**kwargs)
+        self.responses.append(response)
+        return response
+
+
+def make_pool(monkeypatch, clients, **options):
+    pool = RegionPool("text", list(clients), cooldown=30.0, **options)
+    monkeypatch.setattr(pool, "client", lambda region: clients[region])
+    return pool
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def hedged_pool(monkeypatch):
+    def build(primary_latency, hedge_latency):
+        clients = {
+            "us-east-1": RecordingClient(fake_aws.FakeBedrockRuntime(latency=primary_latency)),
+            "us-west-2": RecordingClient(fake_aws.FakeBedrockRuntime(latency=hedge_latency)),
+        }
+        pool = make_pool(monkeypatch, clients, hedge=True, hedge_min_samples=1, hedge_min_delay=0.01)
+        # 첫 리전의 p95 를 50ms 로 만든다
+        pool.health["us-east-1"].record_latency(0.05, "stat")
+        return pool, clients
+    return build
+
+
+def test_hedge_returns_without_waiting_for_slow_primary(hedged_pool):
+    pool, clients = hedged_pool(primary_latency=0.6, hedge_latency=0.02)
+    start = time.perf_counter()
+    response = pool.invoke_model(operation="stat", modelId="model", body=BODY)
+    elapsed = time.perf_counter() - start
+
+    # p95(50ms) + 헤지 지연(20ms) 정도에 끝나고, 첫 호출(600ms)을 기다리지 않는다
+    assert elapsed < 0.3
+    assert response is clients["us-west-2"].responses[0]
+    assert pool.stats()["hedged"] == 1
+    assert pool.stats()["hedgeWins"] == 1
+    # 진 첫 호출의 본문은 끝나는 대로 닫힌다
+    assert wait_until(lambda: clients["us-east-1"].responses)
+    assert wait_until(lambda: clients["us-east-1"].responses[0]["body"]._stream.closed)
+    assert not response["body"]._stream.closed
+
+
+def test_fast_primary_is_not_hedged(hedged_pool):
+    pool, clients = hedged_pool(primary_latency=0.0, hedge_latency=0.0)
+    response = pool.invoke_model(operation="stat", modelId="model", body=BODY)
+    assert response is clients["us-east-1"].responses[0]
+    assert pool.stats()["hedged"] == 0
+    assert clients["us-west-2"].responses == []
+
+
+
+def test_throttled_region_fails_over_and_cools_down(monkeypatch):
+    clients = {
+        "us-east-1": RecordingClient(fake_aws.FakeBedrockRuntime(throttle_rate=1.0)),
+        "us-west-2": RecordingClient(fake_aws.FakeBedrockRuntime()),
+    }
+    pool = make_pool(monkeypatch, clients)
+    response = pool.invoke_model(operation="stat", modelId="model", body=BODY)
+    assert response is clients["us-west-2"].responses[0]
+
+    stats = pool.stats()["regions"]
+    assert (stats["us-east-1"]["errors"], stats["us-east-1"]["failovers"]) == (1, 1)
+    assert stats["us-east-1"]["healthy"] is False
+    # 제외 기간 동안에는 정상 리전으로 먼저 보낸다
+    assert pool.ordered_regions() == ["us-west-2", "us-east-1"]
+    pool.invoke_model(operation="stat", modelId="model", body=BODY)
+    assert pool.stats()["regions"]["us-east-1"]["calls"] == 1
+    assert len(clients["us-west-2"].responses) == 2
+
+
+def test_non_retryable_error_is_not_failed_over(monkeypatch):
+    clients = {
+        "us-east-1": RecordingClient(fake_aws.FakeBedrockRuntime()),
+        "us-west-2": RecordingClient(fake_aws.FakeBedrockRuntime()),
+    }
+    pool = make_pool(monkeypatch, clients)
+    # 요청 형식 오류는 다른 리전에서도 실패하므로 그대로 던진다
+    with pytest.raises(fake_aws.ValidationException):
+        pool.invoke_model(operation="stat", modelId="model", body="{}")
+    assert clients["us-west-2"].responses == []
+    assert pool.stats()["regions"]["us-east-1"]["healthy"] is True
+
+
+def test_all_regions_throttled_raises_last_error(monkeypatch):
+    clients = {region: RecordingClient(fake_aws.FakeBedrockRuntime(throttle_rate=1.0))
+               for region in ("us-east-1", "us-west-2")}
+    pool = make_pool(monkeypatch, clients)
+    with pytest.raises(fake_aws.ThrottlingException):
+        pool.invoke_model(operation="stat", modelId="model", body=BODY)
+    assert all(not health["healthy"] for health in pool.stats()["regions"].values())
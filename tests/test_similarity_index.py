@@ -0,0 +1,90 @@
+"""
+test_similarity_index.py
+2026.10.17
+MinHash + LSH 유사도 색인
+"""
+import pytest
+
+from similarity_index import MinHashIndex, SimilarityIndex, normalize_text
+
+DESC = "손에 쏙 들어오는 작은 단검. 칼날에 맹독이 스며 있다."
+REWORDED = "손에 쏙 들어오는 작은 단검, 칼날에는 맹독이 스며 있다"
+UNRELATED = "몸 전체를 감싸는 판금 갑옷. 성스러운 축복이 깃들어 있다."
+
+
+def test_normalize_text():
+    assert normalize_text("  Hello,   WORLD!! ") == "hello world"
+    assert normalize_text(None) == ""
+
+
+def test_reworded_text_matches_with_source_key():
+    index = MinHashIndex()
+    assert index.add("key-1", DESC, "value-1")
+    value, score, key = index.query(REWORDED)
+    assert (value, key) == ("value-1", "key-1")
+    assert score >= index.threshold
+
+
+def test_reordered_rewording_is_out_of_scope_at_default_threshold():
+    # README 의 "Out of scope": 어순을 바꾼 설명은 기본 threshold 에서 새로 생성한다
+    index = MinHashIndex()
+    index.add("key-1", "작고 날카로운 단검. 독 효과", "value-1")
+    assert index.query("독이 묻은 작고 날카로운 단검") is None
+
+
+def test_unrelated_text_misses():
+    index = MinHashIndex()
+    index.add("key-1", DESC, "value-1")
+    assert index.query(UNRELATED) is None
+    assert index.stats()["misses"] == 1
+
+
+def test_tag_must_match():
+    index = MinHashIndex()
+    index.add("key-1", DESC, "value-1", tag=("poison",))
+    assert index.query(REWORDED, tag=("burn",)) is None
+    assert index.query(REWORDED, tag=("poison",))[0] == "value-1"
+
+
+def test_short_text_is_not_indexed():
+    index = MinHashIndex(min_chars=12)
+    assert not index.add("key-1", "짧은 단검", "value-1")
+    assert index.query("짧은 단검") is None
+    assert len(index) == 0
+
+
+def test_same_key_replaces_entry():
+    index = MinHashIndex()
+    index.add("key-1", DESC, "old")
+    index.add("key-1", DESC, "new")
+    assert len(index) == 1
+    assert index.query(DESC)[0] == "new"
+
+
+def test_evicts_least_recently_used():
+    index = MinHashIndex(max_entries=2)
+    index.add("a", "첫 번째 설명은 이렇게 길게 적는다", 1)
+    index.add("b", "두 번째 설명도 이렇게 길게 적는다", 2)
+    index.add("c", "세 번째 설명 역시 이렇게 길게 적는다", 3)
+    assert len(index) == 2
+    assert index.stats()["evictions"] == 1
+
+
+def test_bands_must_divide_num_perm():
+    with pytest.raises(ValueError):
+        MinHashIndex(num_perm=64, bands=10)
+
+
+def test_from_env_is_opt_in(monkeypatch):
+    monkeypatch.delenv("SIMILARITY_ENABLED", raising=False)
+    assert SimilarityIndex.from_env() is None
+    monkeypatch.setenv("SIMILARITY_ENABLED", "1")
+    index = SimilarityIndex.from_env()
+    assert index.index_options["threshold"] == 0.8
+
+
+def test_indexes_are_separated_by_kind():
+    index = SimilarityIndex()
+    index.add("weapon", "key-1", DESC, "value-1")
+    assert index.lookup("weapon", REWORDED)[0] == "value-1"
+    assert index.lookup("top", REWORDED) is None
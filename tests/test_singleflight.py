@@ -0,0 +1,94 @@
+"""
+test_singleflight.py
+2026.10.17
+요청 병합(SingleFlight / AsyncSingleFlight)
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_run_once():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, "key", work)
+        started.wait(5)
+        waiters = [executor.submit(flight.do, "key", work) for _ in range(3)]
+        # 대기자가 모두 합류한 뒤 끝낸다
+        while flight.stats()["shared"] < 3:
+            time.sleep(0.001)
+        release.set()
+        assert leader.result() == ("result", False)
+        assert [future.result() for future in waiters] == [("result", True)] * 3
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_exception_is_shared_and_key_is_released():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", fail)
+    assert flight.in_flight() == 0
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_overflow_runs_directly():
+    flight = SingleFlight(max_waiters=0)
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "key", lambda: release.wait(5) and "leader")
+        while flight.in_flight() == 0:
+            time.sleep(0.001)
+        assert flight.do("key", lambda: "direct") == ("direct", False)
+        release.set()
+        assert leader.result() == ("leader", False)
+    assert flight.stats()["overflows"] == 1
+
+
+def test_submit_shares_future():
+    flight = SingleFlight()
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first, shared_first = flight.submit("key", executor, lambda: release.wait(5) and "done")
+        second, shared_second = flight.submit("key", executor, lambda: "other")
+        release.set()
+        assert second is first
+        assert (shared_first, shared_second) == (False, True)
+        assert first.result() == "done"
+
+
+def test_async_calls_run_once():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(4)))
+
+    results = asyncio.run(main())
+    assert sorted(results) == [("result", False)] + [("result", True)] * 3
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
@@ -0,0 +1,56 @@
+"""
+test_stat_cache.py
+2026.10.17
+스탯 생성 결과 캐시 (메모리 LRU + SQLite 영속 계층)
+"""
+from stat_cache import LRUCache, StatCache, make_cache_key
+
+
+def test_cache_key_depends_on_every_part():
+    key = make_cache_key("weapon", "단검", "설명", "model", "1")
+    assert key == make_cache_key("weapon", "단검", "설명", "model", "1")
+    assert key != make_cache_key("top", "단검", "설명", "model", "1")
+    assert key != make_cache_key("weapon", "단검", "설명", "model", "2")
+
+
+def test_lru_evicts_oldest():
+    cache = LRUCache(max_size=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_lru_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("stat_cache.time.time", lambda: now[0])
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    now[0] += 61
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_persistent_hit_is_promoted(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    StatCache(persistent_path=path).set("key", "value")
+    cache = StatCache(persistent_path=path)
+    assert cache.get("key") == "value"
+    assert cache.get("key") == "value"
+    stats = cache.stats()
+    assert (stats["persistentHits"], stats["hits"], stats["memoryEntries"]) == (1, 1, 1)
+
+
+def test_persistent_layer_evicts_over_max_rows(tmp_path):
+    cache = StatCache(persistent_path=str(tmp_path / "cache.sqlite3"), persistent_max_rows=2)
+    for i in range(4):
+        cache.set(f"key-{i}", str(i))
+    assert cache.persistent.evictions == 2
+
+
+def test_from_env_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("STAT_CACHE_ENABLED", "0")
+    assert StatCache.from_env() is None
@@ -0,0 +1,53 @@
+"""
+test_stat_solver.py
+2026.10.17
+정규화 합 제약 투영 솔버
+"""
+import random
+
+import pytest
+
+from backend import STAT_CONSTRAINTS, validate_stats
+from stat_solver import SCORE_MAX, SCORE_MIN, normalized_score, rebalance_stats
+
+
+def random_stats(rng):
+    stats = {}
+    for key, constraints in STAT_CONSTRAINTS.items():
+        value = rng.uniform(constraints['min'], constraints['max'])
+        stats[key] = int(value) if constraints['type'] == int else round(value, constraints.get('round', 2))
+    return stats
+
+
+def test_in_range_stats_are_unchanged():
+    stats = validate_stats({"hp": 180, "attack": 23, "defense": 18, "criticalChance": 0.27, "criticalDamage": 2.7,
+                            "speed": 80, "dodgeChance": 0.22, "accuracy": 0.95}, rebalance=False)
+    assert SCORE_MIN <= normalized_score(stats) <= SCORE_MAX
+    assert rebalance_stats(stats, STAT_CONSTRAINTS) is stats
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rebalanced_stats_satisfy_constraints(seed):
+    stats = random_stats(random.Random(seed))
+    result = rebalance_stats(stats, STAT_CONSTRAINTS)
+    # 표기 단위 반올림 때문에 경계에서 아주 조금 벗어날 수 있다
+    assert SCORE_MIN - 0.01 <= normalized_score(result) <= SCORE_MAX + 0.01
+    for key, constraints in STAT_CONSTRAINTS.items():
+        assert constraints['min'] <= result[key] <= constraints['max']
+        assert isinstance(result[key], constraints['type'])
+
+
+def test_emphasized_stats_move_last():
+    low = {key: constraints['min'] for key, constraints in STAT_CONSTRAINTS.items()}
+    low["hp"] = 120
+    result = rebalance_stats(low, STAT_CONSTRAINTS, emphasized={"hp"})
+    # 나머지 스탯만으로 부족하지 않으면 hp 는 그대로
+    assert result["hp"] == 120
+    assert normalized_score(result) >= SCORE_MIN - 0.01
+
+
+def test_all_at_max_is_pulled_down():
+    high = {key: constraints['max'] for key, constraints in STAT_CONSTRAINTS.items()}
+    result = rebalance_stats(high, STAT_CONSTRAINTS)
+    assert normalized_score(result) <= SCORE_MAX + 0.01
+
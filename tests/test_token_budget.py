@@ -0,0 +1,48 @@
+"""
+test_token_budget.py
+2026.10.17
+생성 종류별 max_tokens 예산
+"""
+from token_budget import STOP_MAX_TOKENS, STOP_SEQUENCE, TokenBudget
+
+
+def test_uses_ceiling_until_enough_samples():
+    budget = TokenBudget(800, min_samples=4)
+    for _ in range(3):
+        budget.record(100, "end_turn")
+    assert budget.current() == 800
+    budget.record(100, "end_turn")
+    assert budget.current() == 125
+
+
+def test_budget_is_clamped_to_floor_and_ceiling():
+    budget = TokenBudget(800, floor=64, min_samples=1)
+    budget.record(10, "end_turn")
+    assert budget.current() == 64
+    budget.record(5000, "end_turn")
+    assert budget.current() == 800
+
+
+def test_truncated_outputs_are_not_sampled():
+    budget = TokenBudget(800, min_samples=1)
+    assert budget.record(800, STOP_MAX_TOKENS)
+    assert budget.current() == 800
+    assert not budget.record(200, STOP_SEQUENCE)
+    stats = budget.stats()
+    assert (stats["samples"], stats["truncations"], stats["stopSequences"]) == (1, 1, 1)
+    assert stats["truncationRate"] == 0.5
+
+
+def test_non_adaptive_budget_always_uses_ceiling():
+    budget = TokenBudget(800, min_samples=1, adaptive=False)
+    budget.record(100, "end_turn")
+    assert budget.current() == 800
+
+
+def test_clear_resets_budget():
+    budget = TokenBudget(800, min_samples=1)
+    budget.record(100, "end_turn")
+    budget.record_retry()
+    budget.clear()
+    assert budget.current() == 800
+    assert budget.stats()["retries"] == 0
@@ -0,0 +1,109 @@
+"""
+token_budget.py
+2026.10.17
+생성 종류별 max_tokens 예산 (최근 출력 토큰 수의 상위 백분위수 + 여유분)
+"""
+import math
+import os
+import threading
+from collections import deque
+
+# Claude 응답의 stop_reason 값
+STOP_MAX_TOKENS = "max_tokens"
+STOP_SEQUENCE = "stop_sequence"
+
+
+class TokenBudget:
+    """최근 출력 토큰 수로 max_tokens 를 정하는 스레드 안전 예산.
+    기록이 min_samples 개 모이기 전에는 ceiling(기존 고정값)을 쓰고, 이후에는
+    최근 window 개 출력의 percentile 백분위수 × margin 을 [floor, ceiling] 범위로 제한해 쓴다.
+    max_tokens 에서 잘린 출력은 실제 길이를 알 수 없으므로 길이 기록에서 빼고 잘림 횟수만 센다."""
+
+    def __init__(self, ceiling, floor=64, window=512, percentile=99, margin=1.25, min_samples=32, adaptive=True):
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.percentile = percentile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.adaptive = adaptive
+        self._samples = deque(maxlen=window)
+        self._budget = ceiling
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.truncations = 0
+        self.retries = 0
+        self.stop_sequences = 0
+
+    @classmethod
+    def from_env(cls, ceiling):
+        """환경 변수로 구성 (TOKEN_BUDGET_ENABLED=0 이면 항상 ceiling 사용)"""
+        return cls(
+            ceiling,
+            floor=int(os.environ.get("TOKEN_BUDGET_FLOOR", "64")),
+            window=int(os.environ.get("TOKEN_BUDGET_WINDOW", "512")),
+            percentile=float(os.environ.get("TOKEN_BUDGET_PERCENTILE", "99")),
+            margin=float(os.environ.get("TOKEN_BUDGET_MARGIN", "1.25")),
+            min_samples=int(os.environ.get("TOKEN_BUDGET_MIN_SAMPLES", "32")),
+            adaptive=os.environ.get("TOKEN_BUDGET_ENABLED", "1") != "0",
+        )
+
+    def current(self):
+        """이번 호출에 쓸 max_tokens (기록이 바뀐 뒤 처음 부를 때만 다시 계산)"""
+        if not self.adaptive:
+            return self.ceiling
+        with self._lock:
+            if self._dirty:
+                self._budget = self._compute()
+                self._dirty = False
+            return self._budget
+
+    def _compute(self):
+        if len(self._samples) < self.min_samples:
+            return self.ceiling
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, math.ceil(len(ordered) * self.percentile / 100) - 1)
+        budget = math.ceil(ordered[max(0, index)] * self.margin)
+        return max(self.floor, min(self.ceiling, budget))
+
+    def record(self, output_tokens, stop_reason):
+        """호출 결과 기록. 출력이 max_tokens 에서 잘렸으면 True 반환"""
+        truncated = stop_reason == STOP_MAX_TOKENS
+        with self._lock:
+            self.calls += 1
+            if truncated:
+                self.truncations += 1
+            else:
+                if stop_reason == STOP_SEQUENCE:
+                    self.stop_sequences += 1
+                if output_tokens:
+                    self._samples.append(output_tokens)
+                    self._dirty = True
+        return truncated
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def clear(self):
+        """기록과 카운터 초기화 (예산은 ceiling 으로 돌아감)"""
+        with self._lock:
+            self._samples.clear()
+            self._budget = self.ceiling
+            self._dirty = False
+            self.calls = self.truncations = self.retries = self.stop_sequences = 0
+
+    def stats(self):
+        """예산과 잘림/재시도 카운터 반환"""
+        budget = self.current()
+        with self._lock:
+            return {
+                "maxTokens": budget,
+                "ceiling": self.ceiling,
+                "samples": len(self._samples),
+                "calls": self.calls,
+                "truncations": self.truncations,
+                "truncationRate": round(self.truncations / self.calls, 4) if self.calls else 0.0,
+                "retries": self.retries,
+                "stopSequences": self.stop_sequences,
+            }
@@ -0,0 +1,215 @@
+"""
+tracing.py
+2026.10.17
+요청 단계별 지연 시간 추적 (CloudWatch Embedded Metric Format 로그)
+
+사용 예:
+    with tracing.span("bedrock.stat", kind="weapon") as s:
+        response = client.invoke_model(...)
+        s.record_response(response)
+        s.record_usage(usage)
+
+lambda_handler 한 번의 호출(또는 trace() 블록) 동안 기록된 스팬은 모아서 EMF JSON 한 줄로 출력한다.
+요청 추적 밖에서 실행된 스팬은 기록하지 않는다.
+TRACING_ENABLED=1 일 때만 동작하며, 꺼져 있으면 span() 은 아무 일도 하지 않는 공용 객체를 반환한다.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "0") == "1"
+TRACING_NAMESPACE = os.environ.get("TRACING_NAMESPACE", "TextArena")
+
+# 스팬에서 합산해 메트릭으로 내보내는 토큰 사용량 키 (backend.extract_usage 형식)
+USAGE_KEYS = ("inputTokens", "outputTokens", "cacheReadInputTokens", "cacheWriteInputTokens")
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+
+
+def emit(record):
+    """로그 한 줄 출력 (Lambda 에서는 stdout 이 CloudWatch Logs 로 전달된다)"""
+    print(json.dumps(record, ensure_ascii=False))
+
+
+class _NoopSpan:
+    """추적이 꺼져 있을 때 사용하는 빈 스팬"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def record_usage(self, usage):
+        pass
+
+    def record_response(self, response):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """한 단계의 소요 시간과 속성(토큰 수, 재시도 횟수 등) 기록"""
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+        self.duration_ms = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def record_usage(self, usage):
+        """Claude 토큰 사용량 기록 (extract_usage 결과)"""
+        if usage:
+            for key in USAGE_KEYS:
+                self.attrs[key] = usage.get(key, 0)
+
+    def record_response(self, response):
+        """boto3 응답의 재시도 횟수 기록"""
+        metadata = response.get("ResponseMetadata") or {}
+        self.attrs["retries"] = metadata.get("RetryAttempts", 0)
+
+    def to_dict(self):
+        return dict(self.attrs, name=self.name, durationMs=round(self.duration_ms, 3))
+
+
+class Trace:
+    """요청 하나에서 기록된 스팬과 카운터 (여러 스레드에서 함께 기록)"""
+
+    def __init__(self, dimensions):
+        self.dimensions = dimensions
+        self.spans = []
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+
+def span(name, **attrs):
+    """단계 추적용 컨텍스트 매니저 (추적이 꺼져 있으면 빈 스팬)"""
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, attrs)
+
+
+def incr(name, value=1):
+    """현재 요청의 카운터 증가 (캐시 적중 등)"""
+    if not TRACING_ENABLED:
+        return
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.incr(name, value)
+
+
+def bind(func):
+    """다른 스레드에서 실행될 함수에 현재 요청 추적을 이어 붙임 (executor.submit 전에 사용)"""
+    if not TRACING_ENABLED or _current_trace.get() is None:
+        return func
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+def build_emf(dimensions, spans, counters, total_ms=None):
+    """스팬 목록을 EMF 레코드로 변환.
+    단계별 소요 시간(<스팬 이름>.Duration), 토큰 수, 재시도 횟수, 카운터를 메트릭으로, 스팬 상세는 속성으로 기록한다."""
+    values = {}
+    for s in spans:
+        key = f"{s.name}.Duration"
+        values[key] = values.get(key, 0) + s.duration_ms
+        for usage_key in USAGE_KEYS:
+            if usage_key in s.attrs:
+                metric = usage_key[0].upper() + usage_key[1:]
+                values[metric] = values.get(metric, 0) + s.attrs[usage_key]
+        if "retries" in s.attrs:
+            values["Retries"] = values.get("Retries", 0) + s.attrs["retries"]
+    values.update(counters)
+    if total_ms is not None:
+        values["Latency"] = total_ms
+
+    metrics = []
+    for name in values:
+        unit = "Milliseconds" if name.endswith("Duration") or name == "Latency" else "Count"
+        metrics.append({"Name": name, "Unit": unit})
+        if unit == "Milliseconds":
+            values[name] = round(values[name], 3)
+
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": TRACING_NAMESPACE,
+                "Dimensions": [sorted(dimensions)],
+                "Metrics": metrics,
+            }],
+        },
+    }
+    record.update(dimensions)
+    record.update(values)
+    record["spans"] = [s.to_dict() for s in spans]
+    return record
+
+
+@contextlib.contextmanager
+def trace(dimensions):
+    """블록 안에서 기록된 스팬을 모아 끝날 때 EMF 로그 한 줄로 출력. dimensions: {"Route": ...} 등.
+    yield 되는 dict 에 statusCode 등을 넣으면 로그에 함께 기록된다 (추적이 꺼져 있으면 아무 일도 하지 않음)"""
+    extra = {}
+    if not TRACING_ENABLED:
+        yield extra
+        return
+    current = Trace(dimensions)
+    token = _current_trace.set(current)
+    start = time.perf_counter()
+    try:
+        yield extra
+    finally:
+        total_ms = (time.perf_counter() - start) * 1000
+        _current_trace.reset(token)
+        record = build_emf(current.dimensions, current.spans, current.counters, total_ms)
+        record.update(extra)
+        emit(record)
+
+
+def traced_handler(handler):
+    """lambda_handler 데코레이터. 요청 경로별로 단계 소요 시간을 모아 EMF 로그 한 줄로 출력"""
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if not TRACING_ENABLED:
+            return handler(event, context)
+        with trace({"Route": f"{event.get('httpMethod', '')} {event.get('path', '')}"}) as extra:
+            extra["statusCode"] = 500
+            response = handler(event, context)
+            if isinstance(response, dict):
+                extra["statusCode"] = response.get("statusCode", 500)
+            return response
+    return wrapper